@@ -31,6 +31,15 @@ from pyzbar.pyzbar import ZBarSymbol
 from PIL import Image
 #need to get movement info
 from cozmo.util import degrees, distance_mm, speed_mmps
+from ev import EVCalculator
+from handstate import hand_state
+from shoe import NUM_RANKS, card_code
+
+#the robot decides to hit or stay with the exact expected values (see ev.py).  it doesn't see the dealer's card or
+#the other players' cards yet, so it plays against a ten (the most likely upcard) out of a fresh shoe
+NUM_DECKS = 6
+DEALER_UPCARD = card_code(10)
+ev_calculator = EVCalculator()
 
 #NOTE: in a terminal, open python
 '''
@@ -84,6 +93,13 @@ def QRPickUp(robot):
     else:
         print('I could not find the data.')
 
+def shouldHit(cards):
+    remaining = [4 * NUM_DECKS] * NUM_RANKS
+    remaining[DEALER_UPCARD] -= 1
+    for card in cards:
+        remaining[card_code(card)] -= 1
+    return ev_calculator.should_hit(hand_state(cards), DEALER_UPCARD, remaining)
+
 def cozmo_program(robot: cozmo.robot.Robot):
     '''try:
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -112,11 +128,14 @@ def cozmo_program(robot: cozmo.robot.Robot):
     tot = 0
     net = []
     hand = []
+    cards = []
     #parse the message to turn and ints into ints
     while count < 2:
 
         msg = QRPickUp(robot)
         robot.say_text("My card is" + str(msg[0]) + 'of' + str(msg[1])).wait_for_completed()
+        #keep the card as it was read, for deciding whether to hit
+        cards.append(msg[0])
 
         if msg[0] == 'Jack':
             msg[0] = 10
@@ -140,11 +159,11 @@ def cozmo_program(robot: cozmo.robot.Robot):
     if tot == 21:
         robot.say_text('Thats a BlackJack yay').wait_for_completed()
         robot.turn_in_place(cozmo.util.degrees(360)).wait_for_completed()
-    elif tot < 15:
+    elif shouldHit(cards):
         robot.say_text('Hit me I only have ' + str(tot)).wait_for_completed()
         robot.anim_triggers(cozmo.anim.Triggers.HiccupRobotOnFace).wait_for_completed()
         #robot.set_lift_height(0.0).wait_for_completed()  
-    elif tot >= 16:
+    else:
         robot.say_text("I have " + str(tot) + "so I will stay and pray.").wait_for_completed()
         robot.turn_in_place(cozmo.util.degrees(90)).wait_for_completed()
 
@@ -1,5 +1,6 @@
 
 
+import os
 import numpy as np
 import pandas as pd
 import random
@@ -10,49 +11,81 @@ from sklearn.metrics import confusion_matrix
 from sklearn.model_selection import train_test_split
 from keras.models import Sequential
 from keras.layers import Dense, LSTM, Flatten, Dropout
+from densenet import export_model
+from datastream import encode_dataset, iter_batches, simulated_test_set
+from dataset import open_dataset
+from compaction import compact, training_arrays
 
 
 
 #Now we can train a neural net to play blackjack and evaluate the model
-#let's load the csv file that we created in the last script
-final_df = pd.read_csv('blackjackdata.csv')
-
-#let's get an idea of what the dataframe looks like
-print(final_df.info())
-
-#first, determine the features to include.  i will include the dealer card that is showing, the 
-#cards that the player has been dealt, and whether the player hit or not.  I will not include card
-#counting, or an awareness of the number of players at the table or the number of decks of cards
-#in the shoe.  That might be something that you include in your model.
-
-feature_list = ['dealer_card','init_hand','hit', 'true_count']
-
-#i need to address the problem of the dealer card being numberical and string data.
-#i want the dealer card to be numerical in nature, so I'll use the replace method
-#and do this in place.  If you wonder what that means, try not using that attribute
-#or setting it to be False
-final_df['dealer_card'].replace({'A':11, 'J':10, 'Q':10, 'K':10}, inplace=True)
-
-#to build the model, i need to extract the information in my feature list (omitting 
-#unnecessary features as well as the label, or the attribute that I want my model to predict
-#make sure that the data is in a form that con be converted to a tensor...
-
-#X_df = final_df[feature_list]
-X_df = np.array(final_df[feature_list]).astype(np.float32)
-
-#given the dealer card, the player's hand, and their action (hit or stay) was that the correct choice?
-#for my model predition, i will default to my input being the dealer card, the player's hand, and they hit
-#the question will be was it the correct decision.  if so, then cozmo should hit.  if not, then cozmo should stay.
-#again, your reasoning might be different.  again, make sure that your data is in a form that can
-#be converted to a tensor
-
-#y_df = final_df['outcome']
-y_df = np.array(final_df['outcome']).astype(np.float32).reshape(-1,1)
-
-#next, break up the data into trining data and testing data...20% of the data will be used to evaluate
-#the model, and 80% of the data will be used to train the model.  You can change these parameters
-#to explore the impact.  we are using the train_test_split method we imported.
-X_train, X_test, y_train, y_test = train_test_split(X_df, y_df, test_size = 0.2)
+#set stream_training to True to train on fresh hands straight from the batch simulator (see datastream.py) instead
+#of reading blackjackdata.csv back in...every epoch sees new hands, memory stays flat and nothing touches the disk
+stream_training = False
+#with streaming, how many batches make up an epoch (about as many as 5000 simulated shoes give us)
+steps_per_epoch = 1600
+#a binary dataset (python cli.py simulate --output blackjackdata.dataset, or python dataset.py to convert the csv) is
+#opened memory-mapped and used instead of the csv when it is there
+dataset_path = 'blackjackdata.dataset'
+#set compact_training to True to fit on one weighted row per distinct (dealer_card, init_hand, hit, true_count)
+#instead of every hand (see compaction.py)...the loss is the same, there are only a few thousand rows, and an
+#epoch takes milliseconds instead of minutes
+compact_training = False
+#the training settings, the same for every way of training so the models can be compared
+epochs = 20
+batch_size = 256
+
+if stream_training:
+    #the batches come out already encoded (dealer_card as a number, everything as float32), and the test set is
+    #simulated separately with its own seed
+    X_test, y_test = simulated_test_set(num_shoes=1000, seed=1)
+elif os.path.exists(dataset_path):
+    #the columns are already numbers (dealer_card is a rank code), so encode_dataset only turns them into the same
+    #float32 features and labels the csv path builds below, a shard at a time and reading just the columns it needs
+    dataset = open_dataset(dataset_path)
+    print(f'{len(dataset)} hands in {dataset_path}')
+    X_df, y_df = encode_dataset(dataset)
+    X_train, X_test, y_train, y_test = train_test_split(X_df, y_df, test_size = 0.2)
+else:
+    #let's load the csv file that we created in the last script
+    final_df = pd.read_csv('blackjackdata.csv')
+
+    #let's get an idea of what the dataframe looks like
+    print(final_df.info())
+
+    #first, determine the features to include.  i will include the dealer card that is showing, the 
+    #cards that the player has been dealt, and whether the player hit or not.  I will not include card
+    #counting, or an awareness of the number of players at the table or the number of decks of cards
+    #in the shoe.  That might be something that you include in your model.
+
+    feature_list = ['dealer_card','init_hand','hit', 'true_count']
+
+    #i need to address the problem of the dealer card being numberical and string data.
+    #i want the dealer card to be numerical in nature, so I'll use the replace method
+    #and do this in place.  If you wonder what that means, try not using that attribute
+    #or setting it to be False
+    final_df['dealer_card'].replace({'A':11, 'J':10, 'Q':10, 'K':10}, inplace=True)
+
+    #to build the model, i need to extract the information in my feature list (omitting 
+    #unnecessary features as well as the label, or the attribute that I want my model to predict
+    #make sure that the data is in a form that con be converted to a tensor...
+
+    #X_df = final_df[feature_list]
+    X_df = np.array(final_df[feature_list]).astype(np.float32)
+
+    #given the dealer card, the player's hand, and their action (hit or stay) was that the correct choice?
+    #for my model predition, i will default to my input being the dealer card, the player's hand, and they hit
+    #the question will be was it the correct decision.  if so, then cozmo should hit.  if not, then cozmo should stay.
+    #again, your reasoning might be different.  again, make sure that your data is in a form that can
+    #be converted to a tensor
+
+    #y_df = final_df['outcome']
+    y_df = np.array(final_df['outcome']).astype(np.float32).reshape(-1,1)
+
+    #next, break up the data into trining data and testing data...20% of the data will be used to evaluate
+    #the model, and 80% of the data will be used to train the model.  You can change these parameters
+    #to explore the impact.  we are using the train_test_split method we imported.
+    X_train, X_test, y_train, y_test = train_test_split(X_df, y_df, test_size = 0.2)
 
 
 '''
@@ -88,7 +121,14 @@ model.add(Dense(1, activation='sigmoid'))
 model.compile(loss='binary_crossentropy', optimizer='sgd')
 
 #train the model
-model.fit(X_train, y_train, epochs=20, batch_size=256, verbose=1)
+if stream_training:
+    model.fit(iter_batches(batch_size=batch_size, seed=0), steps_per_epoch=steps_per_epoch, epochs=epochs, verbose=1)
+elif compact_training:
+    X_fit, y_fit, w_fit = training_arrays(*compact(X_train, y_train))
+    print(f'{len(X_train)} training rows compacted to {len(X_fit)}')
+    model.fit(X_fit, y_fit, sample_weight=w_fit, epochs=epochs, batch_size=batch_size, verbose=1)
+else:
+    model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=1)
 
 #make some predictions based on the test data that we reserved
 pred_Y_test = model.predict(X_test)
@@ -169,6 +209,8 @@ print(model.summary())
 
 #we an save the model and then load it to continue where we left off
 model.save('basic_model.keras')
+#and export the weights for the numpy runtime (see densenet.py), which runs the model without tensorflow
+export_model(model, 'basic_model.npz')
 
 
 #NEXT: use the model to determine cozmo's course of action
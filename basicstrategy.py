@@ -0,0 +1,77 @@
+#basic strategy by dynamic programming...solves the best hit/stand play for every hand against every dealer upcard
+
+import numpy as np
+from dealer import NUM_VALUES, VALUE_INDEX, DealerOdds, fold_values
+from ev import stand_value
+from handstate import BUST, SOFT_LIST, TOTAL_LIST, TRANSITION_LIST
+from policy import NUM_TOTALS, TABLE_SHAPE, Policy
+from shoe import CARD_TYPES, NUM_RANKS
+
+#the order the chart is printed in, like the charts on the casino cards
+CHART_UPCARDS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 0]
+
+
+#the (ev of hitting, ev of standing) of a hand state when every card is drawn with the given chances.  values
+#remembers every (total, soft) worked out so far, so each of them is only solved once
+def evaluate(state, chances, odds, values):
+    key = (TOTAL_LIST[state], SOFT_LIST[state])
+    if key in values:
+        return values[key]
+    hit = 0.0
+    for value in range(NUM_VALUES):
+        next_state = TRANSITION_LIST[state][value]
+        hit += chances[value] * (-1.0 if next_state == BUST else max(evaluate(next_state, chances, odds, values)))
+    values[key] = (hit, stand_value(TOTAL_LIST[state], odds))
+    return values[key]
+
+
+#every (total, soft) the player can hold against upcard (a rank code), with its (ev of hitting, ev of standing).
+#the dealer's odds are exact for a full shoe of num_decks decks without the upcard, and the dealer has already
+#checked for blackjack.  the player's cards are drawn with the chances of that same shoe (the usual basic
+#strategy assumption), which is what lets every hand be solved once instead of once for every way to reach it
+def solve_upcard(upcard, num_decks=6, dealer_odds=None):
+    if dealer_odds is None:
+        dealer_odds = DealerOdds()
+    shoe = [4 * num_decks] * NUM_RANKS
+    shoe[upcard] -= 1
+    counts = fold_values(shoe)
+    odds = dealer_odds.distribution_from_values(VALUE_INDEX[upcard], counts, no_blackjack=True)
+    chances = [count / sum(counts) for count in counts]
+    values = {}
+    for state in range(BUST):
+        evaluate(state, chances, odds, values)
+    return values
+
+
+#the solved strategy as a policy table (see policy.py): 1 where hitting is worth more than standing and 0 where it
+#isn't.  basic strategy ignores the count and how many cards were drawn, so every count and hits bucket is the same.
+#totals that can't be soft (or can't happen at all) are filled in as hits, and the bust row stays at 0
+def basic_strategy_table(num_decks=6, hit_soft_17=False):
+    table = np.ones(TABLE_SHAPE, dtype=np.float32)
+    table[NUM_TOTALS - 1] = 0
+    dealer_odds = DealerOdds(hit_soft_17=hit_soft_17)
+    for upcard in range(NUM_RANKS):
+        for (total, soft), (hit, stand) in solve_upcard(upcard, num_decks, dealer_odds).items():
+            table[total, int(soft), upcard] = hit > stand
+    return table
+
+
+def make_basic_policy(num_decks=6, hit_soft_17=False):
+    rules = 'h17' if hit_soft_17 else 's17'
+    return Policy(basic_strategy_table(num_decks, hit_soft_17), f'basic-{num_decks}deck-{rules}')
+
+
+#H or S for every hard and soft total against every upcard
+def print_chart(policy):
+    print(' ' * 7 + ''.join(f'{CARD_TYPES[code]!s:>3}' for code in CHART_UPCARDS))
+    for soft, first in [(0, 4), (1, 13)]:
+        for total in range(first, 22):
+            plays = ['H' if policy.table[total, soft, code, 0, 0] else 'S' for code in CHART_UPCARDS]
+            print(f"{'soft' if soft else 'hard'} {total:>2}" + ''.join(f'{play:>3}' for play in plays))
+
+
+if __name__ == '__main__':
+    #write the table the simulators load with load_policy (see policy.py)
+    basic_policy = make_basic_policy(num_decks=6)
+    basic_policy.save('basic_strategy.npy')
+    print_chart(basic_policy)
@@ -0,0 +1,187 @@
+#vectorized blackjack simulator...plays thousands of shoes at once with numpy
+
+import numpy as np
+import pandas as pd
+from counting import TAG_ARRAYS, initial_running_count
+from handstate import BLACKJACK, EMPTY, TOTALS, TRANSITIONS
+from policy import make_policy
+from records import HAND_CAPACITY, RECORD_FIELDS, empty_records
+from shoe import CARD_TYPES, NUM_RANKS
+
+#the value of each rank code (see shoe.py), with aces counted as 1
+CARD_VALUES = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10], dtype=np.int16)
+
+
+#every row of the returned array is one shuffled shoe.  a spare deck is shuffled onto the end of each row so that a
+#round that starts just above the cut card can never run out of cards (the scalar loop would raise an IndexError there)
+def make_shoes(num_shoes, num_decks, rng):
+    #numpy shuffles 8 byte items faster than single bytes, so the cards only become int8 once they are shuffled
+    one_deck = np.arange(NUM_RANKS, dtype=np.int64)
+    shoes = rng.permuted(np.tile(one_deck, (num_shoes, num_decks * 4)), axis=1)
+    spares = rng.permuted(np.tile(one_deck, (num_shoes, 4)), axis=1)
+    return np.concatenate([shoes, spares], axis=1).astype(np.int8)
+
+
+#simulate num_shoes shoes in lockstep.  each table holds its own shoe and cursor, and every round deals, plays and
+#settles all of the tables that still have more than min_cards cards left.  count_system picks the tag table from
+#counting.py, and the players play policy (a Policy from policy.py, by default the FinalSimBJ.py strategy with the
+#hit_stay coin), so every hit/stay decision is one table lookup for all of the tables at once.  yields one
+#structured array per round (see records.py), with one record per (hand, player) and dealer_card as a rank code.
+#with keep_cards the records also hold every player's and dealer's cards.  nothing is kept between rounds, so the
+#records can be streamed
+def iter_rounds(num_shoes, num_decks=6, players=6, hit_stay=0.5, min_cards=30, seed=None, count_system='hi-lo',
+                keep_cards=False, policy=None):
+    if policy is None:
+        policy = make_policy('final', hit_stay)
+    rng = np.random.default_rng(seed)
+    tags = TAG_ARRAYS[count_system]
+    shoes = make_shoes(num_shoes, num_decks, rng)
+    shoe_size = num_decks * 52
+    cursor = np.zeros(num_shoes, dtype=np.int64)
+    running_count = np.full(num_shoes, initial_running_count(count_system, num_decks), dtype=np.int64)
+    seats = np.arange(players)
+    tables = np.arange(num_shoes)
+
+    while True:
+        tables = tables[shoe_size - cursor[tables] > min_cards]
+        if len(tables) == 0:
+            break
+        start = cursor[tables]
+
+        #deal in the same order as the scalar loop: a card to each player, the dealer's hole card, a second card
+        #to each player, and then the dealer's upcard
+        first = shoes[tables[:, None], start[:, None] + seats]
+        hole = shoes[tables, start + players]
+        second = shoes[tables[:, None], start[:, None] + players + 1 + seats]
+        upcard = shoes[tables, start + 2 * players + 1]
+        cursor[tables] += 2 * players + 2
+
+        #the hole card stays hidden, so it is counted when the dealer turns it over
+        #and the true count divides by the exact number of decks left in each shoe
+        running_count[tables] += tags[first].sum(axis=1) + tags[second].sum(axis=1) + tags[upcard]
+        decks_remaining = (shoe_size - cursor[tables]) / 52
+        true_count = np.round(running_count[tables] / decks_remaining).astype(np.int64)
+
+        #every hand is a hand state (see handstate.py), so adding a card is one lookup in TRANSITIONS
+        state = TRANSITIONS[TRANSITIONS[EMPTY, first], second]
+        init_total = TOTALS[state].astype(np.int16)
+        player_blackjack = BLACKJACK[state]
+
+        dealer_state = TRANSITIONS[TRANSITIONS[EMPTY, hole], upcard]
+        #all bust hands share one state, so keep the dealer's card points to record how far over 21 they went
+        dealer_points = CARD_VALUES[hole] + CARD_VALUES[upcard]
+        dealer_blackjack = BLACKJACK[dealer_state]
+
+        #the card buffers are only filled in when the caller wants the cards
+        num_cards = np.full(state.shape, 2, dtype=np.int64)
+        dealer_num_cards = np.full(len(tables), 2, dtype=np.int64)
+        if keep_cards:
+            cards = np.full(state.shape + (HAND_CAPACITY,), -1, dtype=np.int8)
+            cards[:, :, 0] = first
+            cards[:, :, 1] = second
+            dealer_cards = np.full((len(tables), HAND_CAPACITY), -1, dtype=np.int8)
+            dealer_cards[:, 0] = hole
+            dealer_cards[:, 1] = upcard
+
+        #each seat plays in turn, and every table plays that seat at the same time.  the seat's hands are worked on
+        #as their own arrays, only the hands that are still playing are looked at, and a hand leaves `playing` as
+        #soon as it stays or goes bust
+        hit = np.zeros(state.shape, dtype=bool)
+        for seat in seats:
+            seat_state = state[:, seat].copy()
+            seat_cards = num_cards[:, seat].copy()
+            playing = np.flatnonzero(~(dealer_blackjack | player_blackjack[:, seat]))
+            while len(playing):
+                playing = playing[policy.decide(seat_state[playing], upcard[playing], true_count[playing],
+                                                seat_cards[playing] - 2, rng)]
+                if not len(playing):
+                    break
+                hitters = tables[playing]
+                card = shoes[hitters, cursor[hitters]]
+                cursor[hitters] += 1
+                running_count[hitters] += tags[card]
+                seat_state[playing] = TRANSITIONS[seat_state[playing], card]
+                if keep_cards:
+                    slot = seat_cards[playing]
+                    fits = slot < HAND_CAPACITY
+                    cards[playing[fits], seat, slot[fits]] = card[fits]
+                seat_cards[playing] += 1
+                playing = playing[TOTALS[seat_state[playing]] <= 21]
+            state[:, seat] = seat_state
+            num_cards[:, seat] = seat_cards
+            hit[:, seat] = seat_cards > 2
+
+        #the dealer turns over the hole card and draws to 17 (standing on a soft 17)
+        running_count[tables] += tags[hole]
+        drawing = np.flatnonzero(TOTALS[dealer_state] < 17)
+        while len(drawing):
+            drawers = tables[drawing]
+            card = shoes[drawers, cursor[drawers]]
+            cursor[drawers] += 1
+            running_count[drawers] += tags[card]
+            dealer_state[drawing] = TRANSITIONS[dealer_state[drawing], card]
+            dealer_points[drawing] += CARD_VALUES[card]
+            if keep_cards:
+                slot = dealer_num_cards[drawing]
+                fits = slot < HAND_CAPACITY
+                dealer_cards[drawing[fits], slot[fits]] = card[fits]
+            dealer_num_cards[drawing] += 1
+            drawing = drawing[TOTALS[dealer_state[drawing]] < 17]
+        dealer_total = TOTALS[dealer_state]
+
+        #settle the hand: a bust always loses, then a dealer bust pays everyone left, and otherwise the higher total
+        #wins.  a blackjack is settled like any other 21, so it pushes against a dealer's 21 however many cards that
+        #took (the same as play_hand in FinalSimBJ.py)
+        player_total = TOTALS[state].astype(np.int16)
+        dealer_total = np.where(dealer_total > 21, dealer_points, dealer_total)[:, None]
+        result = np.where(player_total > 21, -1,
+                          np.where(dealer_total > 21, 1, np.sign(player_total - dealer_total)))
+
+        #the label for the model: staying and losing means we should have hit, hitting and losing means we should
+        #have stayed, and otherwise the decision was right (the same rule as decision_evaluation in FinalSimBJ.py)
+        outcome = hit ^ (result == -1)
+
+        shape = state.shape
+        rows = empty_records(state.size, keep_cards)
+        rows['dealer_card'] = np.broadcast_to(upcard[:, None], shape).ravel()
+        rows['dealer_value'] = np.broadcast_to(dealer_total, shape).ravel()
+        rows['dealer_bust'] = np.broadcast_to(dealer_total > 21, shape).ravel()
+        rows['init_hand'] = init_total.ravel()
+        rows['hit'] = hit.ravel()
+        rows['result'] = result.ravel()
+        rows['outcome'] = outcome.ravel()
+        rows['true_count'] = np.broadcast_to(true_count[:, None], shape).ravel()
+        if keep_cards:
+            #every bust hand has the total 22
+            rows['final_total'] = player_total.ravel()
+            rows['num_cards'] = num_cards.ravel()
+            rows['cards'] = cards.reshape(-1, HAND_CAPACITY)
+            rows['dealer_num_cards'] = np.broadcast_to(dealer_num_cards[:, None], shape).ravel()
+            rows['dealer_cards'] = np.repeat(dealer_cards, players, axis=0)
+        yield rows
+
+
+#the same as iter_rounds, but with every round joined into one structured array
+def simulate_batch(num_shoes, **sim_kwargs):
+    rounds = list(iter_rounds(num_shoes, **sim_kwargs))
+    if not rounds:
+        return empty_records(0, sim_kwargs.get('keep_cards', False))
+    #joined as plain bytes, which is much faster than numpy copying the records a field at a time
+    return np.concatenate([rows.view(np.uint8) for rows in rounds]).view(rounds[0].dtype)
+
+
+#turn the batch records into the same dataframe FinalSimBJ.py writes to blackjackdata.csv
+def records_to_dataframe(records):
+    df = pd.DataFrame({field: records[field] for field in RECORD_FIELDS})
+    df['dealer_card'] = np.array(CARD_TYPES, dtype=object)[df['dealer_card'].to_numpy()]
+    for field in ['dealer_bust', 'hit', 'outcome']:
+        df[field] = df[field].astype(np.int64)
+    df['result'] = df['result'].astype(np.float64)
+    return df
+
+
+if __name__ == '__main__':
+    final_df = records_to_dataframe(simulate_batch(5000))
+    final_df.to_csv('blackjackdata.csv')
+    print(final_df.info())
+    print(final_df.describe())
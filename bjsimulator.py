@@ -2,18 +2,16 @@
 
 import numpy as np
 import pandas as pd
-import random
 import matplotlib.pyplot as plt
 import seaborn as sns
+from shoe import RANK_CODES, Shoe
+from handstate import add_card, find_total, hand_state, is_bust
+from policy import load_policy, make_policy
+from ev import EVCalculator
+from counting import CountTracker
 
-#first, let's make a shoe
-def make_shoe(num_decks, card_types):
-    new_shoe = []
-    for i in range(num_decks):
-        for j in range(4):
-            new_shoe.extend(card_types)
-    random.shuffle(new_shoe)
-    return new_shoe
+#first, let's make a shoe...the Shoe keeps the cards in an array and deals them with a cursor
+#(see shoe.py), so drawing a card is a cheap lookup instead of list.pop(0)
 
 
 #next, we need a function to add up the value of the cards in a hand.  Aces can be 1 or 11, and we need to allow for both
@@ -23,29 +21,8 @@ def make_shoe(num_decks, card_types):
 #in general, k aces can add up to either k or k + 10, but we only care about an ace being 11 if it doesn't make the player go bust
 #as a naive approach, we will just consider the value of the ace to be the one that yields the highest hand value...this might change
 #in your decision-making strategy, especially if counting it as an 11 results in a bust, but counting it as a 1 keeps a player alive
-def find_total(hand):
-    face_cards = ['K', 'Q', 'J']
-    aces = 0
-    total = 0
-    #a card will either be an integer in [2, 10] or a face card, or an ace
-    for card in hand:
-        if card == 'A':
-            aces = aces + 1
-        elif card in face_cards:
-            total = total + 10
-        else:
-            total = total + card
-        #at this point, we have the total of the hand, excluding any aces. 
-    if aces == 0:
-        return total
-    else:
-        #count all of the aces as 1, and return the highest of the possible total values, in ascending order; this is one place
-        #where our approach could be improved
-        ace_hand = [total + aces]
-        ace_total = total + aces + 10
-        if  ace_total < 22:
-            ace_hand.append(ace_total)
-        return max(ace_hand)
+#find_total lives in handstate.py, which does this with a precomputed hand state table (one lookup per card,
+#no string comparisons), so every simulator and the game master add up hands the same way
 
 #next, let's simulate ONE game, once the cards have been dealt...we will use this function to determine the player strategy
 #dealer_hand: 2 cards the dealer has
@@ -53,9 +30,7 @@ def find_total(hand):
 #curr_player_results: a list containing the result of each player's hand for this round; if there are three players, it might be [1, -1, 1]
 #dealer_cards: the cards left in the shoe; the shoe with the cards that have been dealt to the players for hitting will have been removed
 #hit_stay: is used to determine if a player hits or stays...you'll probably modify this in your own decision-making process
-#card_count: a dictionary to store the counts of the various card values that have been seen, for future card
-#counting in influencing our decision making and training data
-def play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_stay, card_count, dealer_bust):
+def play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_stay, dealer_bust):
     
     #first, check if the dealer has blackjack.  that can only happen if the dealer has a total of 21, logically, and 
     #the game will be over before it really gets started...the players cannot hit
@@ -78,161 +53,48 @@ def play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_
     #network based on that simulated data, and then compare the results of your neural network to the baseline
     #model generated from this training data.
     else:
+        #the dealer's upcard is the second card they were dealt
+        upcard = RANK_CODES[dealer_hand[1]]
         for player in range(players):
             #the default is that they do not hit
             action = 0
-            known_card = []
             #check for blackjack so that the player wins
             if (len(player_hands[player]) == 2) and (find_total(player_hands[player]) == 21):
                 curr_player_results[0, player] = 1
             else:
-                #check hard 16, stay on anything below 7
-                if (find_total(player_hands[player]) <= 11):
-                                        
-                    player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                    card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
+                #the strategy is a lookup table (see policy.py) and the hand is tracked as a hand state (see
+                #handstate.py), so every hit or stay decision is a single lookup
+                state = hand_state(player_hands[player])
+                hits = 0
+                #the policy table plays by default, or the exact expected values against the unseen cards when
+                #play_by_ev is set (see ev.py)
+                while (ev_calculator.should_hit(state, upcard, count_tracker.remaining) if play_by_ev
+                       else policy.should_hit(state, upcard, true_count, hits)):
+                    #deal a card
+                    player_hands[player].append(dealer_cards.draw_card())
+                    #count the new card
+                    count_tracker.add_card(player_hands[player][-1])
+                    state = add_card(state, RANK_CODES[player_hands[player][-1]])
+                    hits += 1
+                    #note that the player decided to hit
                     action = 1
-
-                    live_total.append(find_total(player_hands[player]))                      
-                  
-                    #if the player goes bust, we need to stop this nonsense and enter the loss...
-                    #we will record their hand value outside of the while loop once we know the player is done
-                    if find_total(player_hands[player]) > 21:
-                        curr_player_results[0, player] = -1
-                        break
-                while (random.random() > hit_stay) and (find_total(player_hands[player]) == 16):
-                    if (dealer_cards[1] == 7) or (dealer_cards[1] == 8) or (dealer_cards[1] == 9) or (dealer_cards[1] == 'A') or (dealer_cards[1] == 'K') or (dealer_cards[1] == 'Q') or (
-                            dealer_cards[1] == 'J') or (dealer_cards[1] ==10):
-                        #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-                    elif (dealer_cards[1] < 7):
-                        action = 0
                     #get the new value of the current hand regardless of if they bust or are still in the game
-                    #we will track the value of the hand during play...it was initially set up in the section below,
-                    #and we are just updating it if the player decides to hit, so that it changes
-                    live_total.append(find_total(player_hands[player]))                      
-                        
-                    #if the player goes bust, we need to stop this nonsense and enter the loss...
-                    #we will record their hand value outside of the while loop once we know the player is done
-                    if find_total(player_hands[player]) > 21:
-                        curr_player_results[0, player] = -1
-                        break
-                    
-                #if dealer card is 4 you nearly always want to stay. 
-                #the dealers highest percent to bust is on 4
-                while (random.random() > hit_stay) and (dealer_cards[1] == 4) and (find_total(player_hands[player]) <= 15):
-                        if (find_total(player_hands[player]) >= 12):
-                            action = 0
-                        else:
-                            #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-                        #get the new value of the current hand regardless of if they bust or are still in the game
-                    #we will track the value of the hand during play...it was initially set up in the section below,
-                    #and we are just updating it if the player decides to hit, so that it changes
-                        live_total.append(find_total(player_hands[player]))                      
-                        
-                    #if the player goes bust, we need to stop this nonsense and enter the loss...
-                    #we will record their hand value outside of the while loop once we know the player is done
-                        if find_total(player_hands[player]) > 21:
-                            curr_player_results[0, player] = -1
-                            break
-                #I will always say that the dealers hidden card is 10
-                #consider when count is -1, 0, and 1 usually hit when had is under 15
-                if (len(player_hands[player]) == 2) and ((counting == 0) or (counting == 1) or (counting == -1)):
-                    while (random.random() > hit_stay) and (find_total(player_hands[player]) < 15):
-
-                        if ((dealer_cards[1] == 'A') or (dealer_cards[1] == 'K') or (dealer_cards[1] == 'Q') or (
-                            dealer_cards[1] == 'J') or (dealer_cards[1] ==10)):
-                        #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-
-                        elif ((dealer_cards[1] == 2) or (dealer_cards[1] == 3) or (
-                            dealer_cards[1] == 7) or (dealer_cards[1] == 8) or (dealer_cards[1] == 9)):
-                         #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-                            
-                        else:
-                            action = 0
-
-                    #get the new value of the current hand regardless of if they bust or are still in the game
-                    #we will track the value of the hand during play...it was initially set up in the section below,
-                    #and we are just updating it if the player decides to hit, so that it changes
-                        live_total.append(find_total(player_hands[player]))                      
-                        
-                    #if the player goes bust, we need to stop this nonsense and enter the loss...
-                    #we will record their hand value outside of the while loop once we know the player is done
-                        if find_total(player_hands[player]) > 21:
-                            curr_player_results[0, player] = -1
-                            break
-                elif (len(player_hands[player]) == 2) and (counting >= 2):
-                    while (random.random() > hit_stay) and (find_total(player_hands[player]) < 15):
-
-                        if ((dealer_cards[1] == 'A') or (dealer_cards[1] == 'K') or (dealer_cards[1] == 'Q') or (
-                            dealer_cards[1] == 'J') or (dealer_cards[1] == 10) or (dealer_cards[1] == 9)
-                            or (dealer_cards[1] == 8) or (dealer_cards[1] == 7)):
-                        #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-                        else:
-                            action = 0
-                elif (len(player_hands[player]) == 2) and (true_count <= -2):
-                    while (random.random() > hit_stay) and (find_total(player_hands[player]) < 15):
-
-                        if ((dealer_cards[1] == 'A') or (dealer_cards[1] == 'K') or (dealer_cards[1] == 'Q') or (
-                            dealer_cards[1] == 'J') or (dealer_cards[1] ==10)):
-                        #deal a card
-                            player_hands[player].append(dealer_cards.pop(0))
-                        #update our dictionary to include the new card
-                            card_count[player_hands[player][-1]] += 1
-                        #note that the player decided to hit
-                            action = 1
-                        else:
-                            action = 0
-                            
-                    #get the new value of the current hand regardless of if they bust or are still in the game
-                    #we will track the value of the hand during play...it was initially set up in the section below,
-                    #and we are just updating it if the player decides to hit, so that it changes
-                        live_total.append(find_total(player_hands[player]))                      
-                        
-                    #if the player goes bust, we need to stop this nonsense and enter the loss...
-                    #we will record their hand value outside of the while loop once we know the player is done
-                        if find_total(player_hands[player]) > 21:
-                            curr_player_results[0, player] = -1
-                            break    
+                    live_total.append(find_total(player_hands[player]))
+                #if the player goes bust, they lose (the table never hits a bust hand, so they have stopped)
+                if is_bust(state):
+                    curr_player_results[0, player] = -1
             #update live_action to reflect the player's choice
             live_action.append(action)
-                    
     #next, the dealer takes their turn based on the rules
-    #first, the dealer will turn over their card, so we can count it and update our dictionary; this is the FIRST card they were dealt
-    card_count[dealer_hand[0]] += 1
+    #first, the dealer will turn over their card, so we can count it; this is the FIRST card they were dealt
+    count_tracker.add_card(dealer_hand[0])
     
     while find_total(dealer_hand) < 17:
         #the dealer takes a card
-        dealer_hand.append(dealer_cards.pop(0))    
+        dealer_hand.append(dealer_cards.draw_card())    
         
-        #update our dictionary for counting cards
-        card_count[dealer_hand[-1]] += 1
+        #count the dealer's new card
+        count_tracker.add_card(dealer_hand[-1])
     
     
     #this round is now complete, so we can determine the outcome...first, determine if the dealer went bust
@@ -264,7 +126,7 @@ def play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_
     
     #the hand is now complete, so we can return the results
     #we will return the results for each player
-    return curr_player_results, dealer_cards, card_count, dealer_bust
+    return curr_player_results, dealer_cards, dealer_bust
                  
 
 #now we can run some simulations
@@ -275,6 +137,15 @@ special_cards = [10, 'J', 'Q', 'K']
 #set some parameters for the number of simulations (each simulation involves going through a shoe)
 simulations = 2000
 
+#the players' strategy, written as a lookup table (see policy.py) with the fair hit_stay coin used below.
+#set strategy_file to a saved table (like the basic_strategy.npy that basicstrategy.py writes) to play that instead
+strategy_file = None
+policy = load_policy(strategy_file) if strategy_file else make_policy('basic', hit_stay=0.5)
+#set play_by_ev to True to play every hand by its exact expected value instead, which is much slower but shows
+#how well the counting strategies could do
+play_by_ev = False
+ev_calculator = EVCalculator()
+
 #set the number of players in the game (we may want to set it to a value between 1 and 4?
 players = 4
 
@@ -306,7 +177,6 @@ player_live_action = []
 dealer_bust = []
 
 #we need to keep track of our card counter throughout the simulation
-card_count_list = []
 
 #we will track characteristics related to the shoe or simulation, as noted above:
 first_game = True
@@ -328,12 +198,12 @@ for sim in range(simulations):
     games_played = 0
     
     #create the shoe
-    dealer_cards = make_shoe(num_decks, card_types)
+    dealer_cards = Shoe(num_decks)
     
-    #for each simulation, create a dictionary to keep track of the cards in the shoe, initially set to 0 for all cards
-    card_count = {'A':0, 2:0, 3:0, 4:0, 5:0, 6:0,7:0, 8:0, 9:0, 10:0, 'J':0, 'Q':0, 'K':0}    
+    #the tracker counts every card as it is seen (see counting.py)
+    count_tracker = CountTracker(num_decks)
     counting = 0
-    true_count = 0 
+    true_count = 0
     #play until the shoe is almost empty...we can change this to be a function of the number of decks
     #in a shoe, but we won't start a game if there are fewer than 20 cards in a shoe...if we limit
     #the number of players to 4 (plus the dealer), then we'll need at least 10 cards for the game, and
@@ -353,52 +223,23 @@ for sim in range(simulations):
         live_action = []
         
         
-        #deal the FIRST card to all players and update our card counting dictionary
+        #deal the FIRST card to all players and count them
         for player, hand in enumerate(player_hands):
-            player_hands[player].append(dealer_cards.pop(0))
-            card_count[player_hands[player][-1]] += 1
-        if (player_hands[player][-1] == 'A') or (player_hands[player][-1] =='K') or (
-            player_hands[player][-1] == 'Q') or player_hands[player][-1] == 'J' or player_hands[player][-1] == 10:  
-            counting -= 1
-            true_count = round(counting / num_decks)
-        elif player_hands[player][-1] >= 2 and player_hands[player][-1] <= 6:
-            counting += 1
-            true_count = round(counting / num_decks)
-        else: 
-            counting += 0
-            true_count = round(counting / num_decks)
-        #dealer gets a card, and the card counting dictionary is NOT updated
-        dealer_hand.append(dealer_cards.pop(0))
-        #card_count[dealer_hand[-1]] += 1
+            player_hands[player].append(dealer_cards.draw_card())
+            count_tracker.add_card(player_hands[player][-1])
+        #dealer gets a card, which is NOT counted until it is turned over
+        dealer_hand.append(dealer_cards.draw_card())
         
-        #deal the SECOND card to all players and update our card counting dictionary
+        #deal the SECOND card to all players and count them
         for player, hand in enumerate(player_hands):
-            player_hands[player].append(dealer_cards.pop(0))
-            card_count[player_hands[player][-1]] += 1
-        if (player_hands[player][-1] == 'A') or (player_hands[player][-1] =='K') or (
-            player_hands[player][-1] == 'Q') or player_hands[player][-1] == 'J' or player_hands[player][-1] == 10:
-            counting -= 1
-            true_count = round(counting / num_decks)
-        elif player_hands[player][-1] >= 2 and player_hands[player][-1] <= 6:
-            counting += 1
-            true_count = round(counting / num_decks)
-        else: 
-            counting += 0
-            true_count = round(counting / num_decks)
+            player_hands[player].append(dealer_cards.draw_card())
+            count_tracker.add_card(player_hands[player][-1])
             
         #the dealer gets a card, and our card counter will be updated with the card that is showing
-        dealer_hand.append(dealer_cards.pop(0))
-        card_count[dealer_hand[-1]] += 1
-        if (dealer_hand[-1] == 'A') or (dealer_hand[-1] == 'K') or (
-            dealer_hand[-1] == 'Q') or (dealer_hand[-1] == 'J') or (dealer_hand[-1] == 10):
-            counting -= 1
-            true_count = round(counting / num_decks)
-        elif dealer_hand[-1] >= 2 and dealer_hand[-1] <= 6:
-            counting += 1
-            true_count = round(counting / num_decks)
-        else: 
-            counting += 0
-            true_count = round(counting / num_decks)
+        dealer_hand.append(dealer_cards.draw_card())
+        count_tracker.add_card(dealer_hand[-1])
+        counting = count_tracker.running_count
+        true_count = round(count_tracker.true_count())
         #print(counting)
         #print(true_count)
         #record the player's live total after cards are dealt...if a player hits, we will update this information
@@ -408,7 +249,7 @@ for sim in range(simulations):
         #make this more sophisticated
         hit_stay = 0.5
         
-        curr_player_results, dealer_cards, card_count, dealer_bust = play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_stay, card_count, dealer_bust)
+        curr_player_results, dealer_cards, dealer_bust = play_hand(dealer_hand, player_hands, curr_player_results, dealer_cards, hit_stay, dealer_bust)
         #track the outcome of the hand
         #we want to know the dealer's card that is showing and their final total
         dealer_card_history.append(dealer_hand[1])
@@ -436,7 +277,6 @@ for sim in range(simulations):
         
         sim_number_list.append(sim)
         games_played_in_sim.append(games_played)
-        card_count_list.append(card_count.copy())
         prev_sim = sim
 
 
@@ -0,0 +1,140 @@
+#one command line for the simulators, training, the model search, evaluation, the game master and the hit/stand
+#advisor.  each subcommand imports what it needs when it runs, so `simulate` never pays for tensorflow, sklearn or
+#the plotting libraries.  run `python cli.py <subcommand> --help` for the options
+#
+#   python cli.py simulate --shoes 5000 --output blackjackdata.csv
+#   python cli.py advise 10 6 --upcard 7
+
+import argparse
+import runpy
+import sys
+
+
+def parse_card(text):
+    #cards are typed the simulator way (A, 2, ..., 10, J, Q, K) or the game master way (Ace, ..., King)
+    from shoe import card_code
+    card = int(text) if text.isdigit() else (text.upper() if len(text) == 1 else text.capitalize())
+    try:
+        card_code(card)
+    except KeyError:
+        raise argparse.ArgumentTypeError(f'{text!r} is not a card')
+    return card
+
+
+def simulate(args):
+    from parallelsim import run_parallel_stats, run_parallel_to_writer
+    from policy import load_policy, make_policy
+    from recordwriter import HandRecordWriter
+    if args.strategy.endswith('.npy'):
+        policy = load_policy(args.strategy)
+    else:
+        policy = make_policy(args.strategy, args.hit_stay)
+    sim_kwargs = dict(num_decks=args.decks, players=args.players, count_system=args.count_system, policy=policy)
+    if args.stats_only:
+        #keep only the statistics, however many shoes are played
+        from evaluation import report
+        stats = run_parallel_stats(args.shoes, workers=args.workers, seed=args.seed, shard_size=args.shard_size,
+                                   **sim_kwargs)
+        report(stats.summarize(args.players))
+        return
+    with HandRecordWriter(args.output, chunk_size=args.chunk_size) as writer:
+        rows = run_parallel_to_writer(args.shoes, writer, workers=args.workers, seed=args.seed,
+                                      shard_size=args.shard_size, **sim_kwargs)
+    print(f'{rows} hands written to {args.output}')
+
+
+def run_script(args):
+    #training and evaluation are still plain scripts, so run them as if they were started directly
+    sys.argv = [args.script]
+    runpy.run_path(args.script, run_name='__main__')
+
+
+def search(args):
+    from modelsearch import DEFAULT_SWEEP, load_training_data, search as run_search
+    results = run_search(DEFAULT_SWEEP, *load_training_data(args.data), workers=args.workers,
+                         threads_per_worker=args.threads, cache_path=args.cache)
+    for result in results:
+        print(f"auc {result['auc']:.4f}  accuracy {result['accuracy']:.2f}% at {result['best_threshold']}  "
+              f"{result['config']}")
+
+
+def serve(args):
+    from gamemaster import AsyncGameMaster, GameMaster
+    if args.select:
+        GameMaster(args.port, framing=args.framing).listen()
+    else:
+        AsyncGameMaster(args.port, framing=args.framing).listen()
+
+
+def advise(args):
+    from ev import EVCalculator
+    from handstate import hand_state
+    from shoe import NUM_RANKS, card_code
+    remaining = [4 * args.decks] * NUM_RANKS
+    for card in args.cards + [args.upcard] + args.seen:
+        remaining[card_code(card)] -= 1
+    calculator = EVCalculator()
+    state = hand_state(args.cards)
+    upcard = card_code(args.upcard)
+    hit = calculator.hit_ev(state, upcard, remaining)
+    stand = calculator.stand_ev(state, upcard, remaining)
+    print(f'hit {hit:+.4f}  stand {stand:+.4f}  ->  {"hit" if hit > stand else "stand"}')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description='blackjack simulators, models and game master')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sim = commands.add_parser('simulate', help='simulate shoes and write one row per player per hand')
+    sim.add_argument('--shoes', type=int, default=5000)
+    sim.add_argument('--output', default='blackjackdata.csv', help='a .csv or .parquet file, or a .dataset folder')
+    sim.add_argument('--workers', type=int, default=None, help='processes to use (all of the cores by default)')
+    sim.add_argument('--seed', type=int, default=None)
+    sim.add_argument('--decks', type=int, default=6)
+    sim.add_argument('--players', type=int, default=6)
+    sim.add_argument('--strategy', default='final', help='final, basic, or a saved policy table (.npy)')
+    sim.add_argument('--hit-stay', type=float, default=0.5)
+    sim.add_argument('--count-system', default='hi-lo')
+    sim.add_argument('--shard-size', type=int, default=500)
+    sim.add_argument('--chunk-size', type=int, default=100000)
+    sim.add_argument('--stats-only', action='store_true', help='print the statistics instead of writing the hands')
+    sim.set_defaults(handler=simulate)
+
+    train = commands.add_parser('train', help='train the model (runs ModelTraining.py)')
+    train.add_argument('--script', default='ModelTraining.py')
+    train.set_defaults(handler=run_script)
+
+    evaluate = commands.add_parser('evaluate', help='evaluate the simulated data (runs EvaluateData.py)')
+    evaluate.add_argument('--script', default='EvaluateData.py')
+    evaluate.set_defaults(handler=run_script)
+
+    search_parser = commands.add_parser('search', help='train many model configurations at once (see modelsearch.py)')
+    search_parser.add_argument('--data', default=None, help='a .dataset folder or a csv (blackjackdata by default)')
+    search_parser.add_argument('--workers', type=int, default=None)
+    search_parser.add_argument('--threads', type=int, default=None, help='threads for each worker')
+    search_parser.add_argument('--cache', default='model_search_cache.json')
+    search_parser.set_defaults(handler=search)
+
+    serve_parser = commands.add_parser('serve', help='run the game master for the cozmos')
+    serve_parser.add_argument('--port', type=int, default=3306)
+    serve_parser.add_argument('--select', action='store_true', help='use the older select loop instead of asyncio')
+    serve_parser.add_argument('--framing', choices=['auto', 'newline', 'legacy'], default='auto',
+                              help='newline terminated messages, one message per read, or whichever each client uses')
+    serve_parser.set_defaults(handler=serve)
+
+    advise_parser = commands.add_parser('advise', help='the exact hit and stand values for a hand')
+    advise_parser.add_argument('cards', nargs='+', type=parse_card, help="the player's cards, like 10 6 or A 7")
+    advise_parser.add_argument('--upcard', type=parse_card, required=True, help="the dealer's card showing")
+    advise_parser.add_argument('--seen', nargs='*', type=parse_card, default=[], help='other cards already seen')
+    advise_parser.add_argument('--decks', type=int, default=6)
+    advise_parser.set_defaults(handler=advise)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#compact the training data...the model's four features only take a few thousand distinct values, so millions of
+#rows fold down to one row per distinct feature vector with how many hands had it and how many of them were
+#labelled 1.  training on those rows with weights gives the same loss as training on every hand
+#
+#   python compaction.py      (compacts blackjackdata.dataset or blackjackdata.csv and saves it next to it)
+
+import os
+import numpy as np
+
+COMPACT_NAME = 'compact.npz'
+
+
+#the distinct rows (in sorted order) and which one each row is, like np.unique(axis=0) but much faster on millions
+#of rows: every column only has a few distinct values, so each row becomes one integer key and only those are sorted
+def unique_rows(features):
+    key = np.zeros(len(features), dtype=np.int64)
+    for column in features.T:
+        values, codes = np.unique(column, return_inverse=True)
+        key = key * len(values) + codes.ravel()
+    keys, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return features[first], inverse.ravel()
+
+
+#one row per distinct feature vector: the features, how many samples had them and how many of those were positive
+def compact(features, labels):
+    features = np.asarray(features, dtype=np.float32)
+    unique, inverse = unique_rows(features)
+    counts = np.bincount(inverse, minlength=len(unique))
+    positives = np.bincount(inverse, weights=np.asarray(labels, dtype=np.float64).ravel(), minlength=len(unique))
+    return unique, counts.astype(np.int64), np.rint(positives).astype(np.int64)
+
+
+#fold compacted parts (from separate chunks or shards) into one, adding up the counts of rows they share
+def merge_compacted(parts):
+    parts = list(parts)
+    if not parts:
+        return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    features = np.concatenate([part[0] for part in parts])
+    unique, inverse = unique_rows(features)
+    counts = np.bincount(inverse, weights=np.concatenate([part[1] for part in parts]), minlength=len(unique))
+    positives = np.bincount(inverse, weights=np.concatenate([part[2] for part in parts]), minlength=len(unique))
+    return unique, np.rint(counts).astype(np.int64), np.rint(positives).astype(np.int64)
+
+
+#the rows, labels and sample weights to hand to model.fit.  binary crossentropy is linear in the label, so a row
+#with the fraction of positives as its label and the number of samples as its weight ('binomial') has exactly the
+#loss of all of its samples.  'weights' keeps 0/1 labels instead, with a positive and a negative row per feature
+#vector.  the weights are scaled to average 1 per row, so keras' mean loss matches the mean over every sample
+def training_arrays(features, counts, positives, mode='binomial'):
+    counts = np.asarray(counts, dtype=np.float64)
+    positives = np.asarray(positives, dtype=np.float64)
+    if mode == 'binomial':
+        rows, labels, weights = features, positives / counts, counts
+    elif mode == 'weights':
+        rows = np.concatenate([features, features])
+        labels = np.concatenate([np.ones(len(counts)), np.zeros(len(counts))])
+        weights = np.concatenate([positives, counts - positives])
+        keep = weights > 0
+        rows, labels, weights = rows[keep], labels[keep], weights[keep]
+    else:
+        raise ValueError(f"unknown mode {mode!r}, expected 'binomial' or 'weights'")
+    weights = weights * len(weights) / weights.sum()
+    return (np.asarray(rows, dtype=np.float32), labels.astype(np.float32).reshape(-1, 1),
+            weights.astype(np.float32))
+
+
+def save_compacted(path, features, counts, positives):
+    np.savez(path, features=features, counts=counts, positives=positives)
+
+
+def load_compacted(path):
+    saved = np.load(path)
+    return saved['features'], saved['counts'], saved['positives']
+
+
+#where the compacted copy of a dataset lives: inside a .dataset folder, or next to a csv
+def compact_path(data_path):
+    if os.path.isdir(data_path):
+        return os.path.join(data_path, COMPACT_NAME)
+    return os.path.splitext(data_path)[0] + '_' + COMPACT_NAME
+
+
+#compact a whole dataset (see dataset.py) a shard at a time, or a csv chunk_size rows at a time, and save it next
+#to the raw data
+def compact_file(data_path, chunk_size=1000000):
+    from datastream import encode
+    parts = []
+    if os.path.isdir(data_path):
+        from dataset import open_dataset
+        for records in open_dataset(data_path).iter_shards():
+            parts.append(compact(*encode(records)))
+    else:
+        import pandas as pd
+        from dataset import records_from_csv
+        for chunk in pd.read_csv(data_path, index_col=0, chunksize=chunk_size):
+            parts.append(compact(*encode(records_from_csv(chunk))))
+    compacted = merge_compacted(parts)
+    save_compacted(compact_path(data_path), *compacted)
+    return compacted
+
+
+if __name__ == '__main__':
+    data_path = 'blackjackdata.dataset' if os.path.isdir('blackjackdata.dataset') else 'blackjackdata.csv'
+    features, counts, positives = compact_file(data_path)
+    print(f'{counts.sum()} hands compacted to {len(counts)} rows in {compact_path(data_path)}')
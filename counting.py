@@ -0,0 +1,63 @@
+#incremental card counting...one tracker per shoe, updated once for every card that is seen
+
+import numpy as np
+from shoe import NUM_RANKS, card_code
+
+#the tag for each rank code (A, 2, 3, 4, 5, 6, 7, 8, 9, 10, J, Q, K) in each counting system
+TAG_TABLES = {
+    'hi-lo':    [-1, 1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1],
+    'ko':       [-1, 1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1],
+    'hi-opt-2': [0, 1, 1, 2, 2, 1, 1, 0, 0, -2, -2, -2, -2],
+    'omega-2':  [0, 1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2],
+    'zen':      [-1, 1, 1, 2, 2, 2, 1, 0, 0, -2, -2, -2, -2],
+}
+
+#numpy versions of the tag tables, for counting whole arrays of cards at once (see batchsim.py)
+TAG_ARRAYS = {system: np.array(tags, dtype=np.int16) for system, tags in TAG_TABLES.items()}
+
+
+#KO is an unbalanced count (a full shoe adds up to +4 per deck), so it starts below zero and the running count
+#itself is used to bet and play.  the balanced systems all start at zero
+def initial_running_count(system, num_decks):
+    if system == 'ko':
+        return 4 - 4 * num_decks
+    return 0
+
+
+class CountTracker:
+    #keeps the running count, the number of cards seen and the composition of the cards still in the shoe.
+    #adding a card and every query are O(1), so it is cheap to ask for the true count at each decision
+    def __init__(self, num_decks, system='hi-lo'):
+        if system not in TAG_TABLES:
+            raise ValueError(f'unknown counting system {system!r}, expected one of {sorted(TAG_TABLES)}')
+        self.num_decks = num_decks
+        self.system = system
+        self.tags = TAG_TABLES[system]
+        self.shoe_size = num_decks * 52
+        self.reset()
+
+    def reset(self):
+        #start counting a freshly shuffled shoe
+        self.running_count = initial_running_count(self.system, self.num_decks)
+        self.cards_seen = 0
+        self.remaining = [4 * self.num_decks] * NUM_RANKS
+
+    def add(self, code):
+        #count a card given by its rank code
+        self.running_count += self.tags[code]
+        self.cards_seen += 1
+        self.remaining[code] -= 1
+
+    def add_card(self, card):
+        #count a card written the simulator way ('A', 2, ..., 'K') or the game master way ('Ace', ..., 'King')
+        self.add(card_code(card))
+
+    def cards_remaining(self):
+        return self.shoe_size - self.cards_seen
+
+    def decks_remaining(self):
+        #exact number of decks left in the shoe (never less than one card, so the true count stays finite)
+        return max(self.cards_remaining(), 1) / 52
+
+    def true_count(self):
+        return self.running_count / self.decks_remaining()
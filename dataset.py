@@ -0,0 +1,170 @@
+#binary hand record dataset...a folder of .npy shards (one file per column per shard) and a manifest.json, so
+#training and evaluation can open a hundred million hands memory-mapped instead of parsing blackjackdata.csv
+#
+#   blackjackdata.dataset/manifest.json
+#   blackjackdata.dataset/shard_00000/dealer_card.npy
+#   blackjackdata.dataset/shard_00000/init_hand.npy
+#   ...
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from records import RECORD_DTYPE, RECORD_FIELDS
+from shoe import CARD_TYPES
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+#blackjackdata.csv writes the dealer's card the way the simulators name it ('A', '2', ..., 'K'), the dataset keeps
+#the rank code (see shoe.py)
+CSV_CARD_CODES = {str(card): code for code, card in enumerate(CARD_TYPES)}
+
+
+class DatasetWriter:
+    #every write_shard call adds one shard of records (a structured array, see records.py).  each column is saved
+    #with its own fixed width type, and the manifest is written on close with the rows in every shard
+    def __init__(self, path):
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f'{path!r} already holds a dataset')
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shard_rows = []
+
+    def write_shard(self, records):
+        if len(records) == 0:
+            return
+        name = f'shard_{len(self.shard_rows):05d}'
+        os.makedirs(os.path.join(self.path, name), exist_ok=True)
+        for field in RECORD_FIELDS:
+            np.save(os.path.join(self.path, name, field + '.npy'), np.ascontiguousarray(records[field]))
+        self.shard_rows.append(len(records))
+
+    def close(self):
+        manifest = {'version': FORMAT_VERSION,
+                    'fields': {field: RECORD_DTYPE[field].str for field in RECORD_FIELDS},
+                    'rows': sum(self.shard_rows),
+                    'shards': [{'name': f'shard_{index:05d}', 'rows': rows}
+                               for index, rows in enumerate(self.shard_rows)]}
+        with open(os.path.join(self.path, MANIFEST), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ShardedColumn:
+    #one column of a dataset with more than one shard, without joining the shards: len() and indexing only read
+    #the shards the rows are in.  np.asarray(column) does join them all in memory, so anything that works through
+    #a whole column should go through Dataset.iter_shards instead
+    def __init__(self, shards):
+        self.shards = shards
+        self.offsets = np.cumsum([0] + [len(shard) for shard in shards])
+        self.dtype = shards[0].dtype
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def shape(self):
+        return (len(self),)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return self[np.arange(start, stop, step)]
+            return np.concatenate([shard[max(start - offset, 0):max(stop - offset, 0)]
+                                   for shard, offset in zip(self.shards, self.offsets)])
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = np.where(index < 0, index + len(self), index)
+        if np.any((index < 0) | (index >= len(self))):
+            raise IndexError(f'index out of range for a column of {len(self)} rows')
+        shard = np.searchsorted(self.offsets, index, side='right') - 1
+        if index.ndim == 0:
+            return self.shards[shard][index - self.offsets[shard]]
+        values = np.empty(index.shape, dtype=self.dtype)
+        for number in np.unique(shard):
+            rows = shard == number
+            values[rows] = self.shards[number][index[rows] - self.offsets[number]]
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        column = np.concatenate(self.shards)
+        return column if dtype is None else column.astype(dtype)
+
+
+class Dataset:
+    #a dataset opened for reading.  nothing is read when it is opened: every column of every shard is a read-only
+    #memory map, and only the pages that get touched are read off the disk.  dataset['init_hand'] gives a column
+    #(the memory map itself for a single shard, a ShardedColumn otherwise) and len(dataset) the number of hands.
+    #to work through every hand, go a shard at a time with iter_shards
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST)) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest['version'] != FORMAT_VERSION:
+            raise ValueError(f'{path!r} is dataset version {manifest["version"]}, expected {FORMAT_VERSION}')
+        self.path = path
+        self.fields = list(manifest['fields'])
+        self.rows = manifest['rows']
+        self.shard_names = [shard['name'] for shard in manifest['shards']]
+        self.shard_rows = [shard['rows'] for shard in manifest['shards']]
+
+    def __len__(self):
+        return self.rows
+
+    def shard_column(self, index, field):
+        if field not in self.fields:
+            raise KeyError(field)
+        return np.load(os.path.join(self.path, self.shard_names[index], field + '.npy'), mmap_mode='r')
+
+    def __getitem__(self, field):
+        if len(self.shard_names) == 1:
+            return self.shard_column(0, field)
+        if not self.shard_names:
+            return np.empty(0, dtype=RECORD_DTYPE[field])
+        return ShardedColumn([self.shard_column(index, field) for index in range(len(self.shard_names))])
+
+    def iter_shards(self, fields=None):
+        #one structured array per shard with just the given fields, for working through more hands than fit
+        #in memory
+        fields = self.fields if fields is None else fields
+        for index, rows in enumerate(self.shard_rows):
+            records = np.empty(rows, dtype=[(field, RECORD_DTYPE[field]) for field in fields])
+            for field in fields:
+                records[field] = self.shard_column(index, field)
+            yield records
+
+    def to_records(self):
+        return np.concatenate(list(self.iter_shards())) if self.shard_rows else np.empty(0, dtype=RECORD_DTYPE)
+
+
+def open_dataset(path):
+    return Dataset(path)
+
+
+#a dataframe read from blackjackdata.csv (as written by HandRecordWriter) back as a structured array of records
+def records_from_csv(df):
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records['dealer_card'] = df['dealer_card'].astype(str).map(CSV_CARD_CODES).to_numpy()
+    for field in RECORD_FIELDS[1:]:
+        records[field] = df[field].to_numpy()
+    return records
+
+
+#turn an existing blackjackdata.csv into a dataset, chunk_size rows per shard
+def convert_csv(csv_path, path, chunk_size=1000000):
+    with DatasetWriter(path) as writer:
+        for chunk in pd.read_csv(csv_path, index_col=0, chunksize=chunk_size):
+            writer.write_shard(records_from_csv(chunk))
+    return open_dataset(path)
+
+
+if __name__ == '__main__':
+    dataset = convert_csv('blackjackdata.csv', 'blackjackdata.dataset')
+    print(f'{len(dataset)} hands in {len(dataset.shard_names)} shards written to blackjackdata.dataset')
@@ -0,0 +1,83 @@
+#stream training batches straight from the batch simulator...no csv in between, and only one batch and one round of
+#records in memory at a time, so a model can train on as many fresh hands as it likes
+
+import numpy as np
+from batchsim import iter_rounds, simulate_batch
+
+#the model's inputs and label, the same columns ModelTraining.py picks out of blackjackdata.csv
+FEATURE_FIELDS = ['dealer_card', 'init_hand', 'hit', 'true_count']
+LABEL_FIELD = 'outcome'
+
+#the dealer's card as ModelTraining.py encodes it: an ace is 11 and the face cards are 10 (indexed by rank code)
+DEALER_CARD_VALUES = np.array([11, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10], dtype=np.float32)
+
+
+#turn a structured array of records (see records.py) into float32 features and a column of labels
+def encode(records):
+    features = np.empty((len(records), len(FEATURE_FIELDS)), dtype=np.float32)
+    features[:, 0] = DEALER_CARD_VALUES[records['dealer_card']]
+    for column, field in enumerate(FEATURE_FIELDS[1:], start=1):
+        features[:, column] = records[field]
+    labels = records[LABEL_FIELD].astype(np.float32).reshape(-1, 1)
+    return features, labels
+
+
+#encode a dataset (see dataset.py) a shard at a time, so only the model's columns of one shard are read at once and
+#the float32 features are the only copy of the hands in memory
+def encode_dataset(dataset):
+    features = np.empty((len(dataset), len(FEATURE_FIELDS)), dtype=np.float32)
+    labels = np.empty((len(dataset), 1), dtype=np.float32)
+    start = 0
+    for records in dataset.iter_shards(FEATURE_FIELDS + [LABEL_FIELD]):
+        features[start:start + len(records)], labels[start:start + len(records)] = encode(records)
+        start += len(records)
+    return features, labels
+
+
+#an endless generator of (features, labels) batches of batch_size rows, which keras' model.fit takes directly
+#(give it steps_per_epoch).  the simulator plays shoes_per_pass shoes at a time, each pass with its own child of
+#the seed.  every round deals all of those shoes at the same depth, so rounds are gathered into a shuffle buffer of
+#about shuffle_rows rows (spanning dozens of rounds) before anything is handed out: the buffer is shuffled, half of
+#it is cut into batches and the other half stays to be mixed with the next rounds.  extra keyword arguments
+#(num_decks, players, policy, ...) go to batchsim.iter_rounds
+def iter_batches(batch_size=256, shoes_per_pass=500, seed=None, shuffle_rows=131072, **sim_kwargs):
+    if shuffle_rows < 2 * batch_size:
+        raise ValueError(f'shuffle_rows must be at least two batches ({2 * batch_size} rows), not {shuffle_rows}')
+    seeds = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seeds.spawn(1)[0])
+    features = [np.empty((0, len(FEATURE_FIELDS)), dtype=np.float32)]
+    labels = [np.empty((0, 1), dtype=np.float32)]
+    buffered = 0
+    while True:
+        for rows in iter_rounds(shoes_per_pass, seed=seeds.spawn(1)[0], **sim_kwargs):
+            round_features, round_labels = encode(rows)
+            features.append(round_features)
+            labels.append(round_labels)
+            buffered += len(round_labels)
+            if buffered < shuffle_rows:
+                continue
+            order = rng.permutation(buffered)
+            all_features = np.concatenate(features)[order]
+            all_labels = np.concatenate(labels)[order]
+            handed_out = buffered // 2 // batch_size * batch_size
+            for start in range(0, handed_out, batch_size):
+                yield all_features[start:start + batch_size], all_labels[start:start + batch_size]
+            features = [all_features[handed_out:]]
+            labels = [all_labels[handed_out:]]
+            buffered -= handed_out
+
+
+#a fixed set of hands to test on, simulated with a different seed than the training stream
+def simulated_test_set(num_shoes=1000, seed=None, **sim_kwargs):
+    return encode(simulate_batch(num_shoes, seed=seed, **sim_kwargs))
+
+
+#the same batches as a tf.data pipeline (tensorflow is only imported here), prefetching while the model trains
+def make_dataset(batch_size=256, shoes_per_pass=500, seed=None, shuffle_rows=131072, **sim_kwargs):
+    import tensorflow as tf
+    signature = (tf.TensorSpec(shape=(None, len(FEATURE_FIELDS)), dtype=tf.float32),
+                 tf.TensorSpec(shape=(None, 1), dtype=tf.float32))
+    dataset = tf.data.Dataset.from_generator(lambda: iter_batches(batch_size, shoes_per_pass, seed, shuffle_rows,
+                                                                          **sim_kwargs),
+                                             output_signature=signature)
+    return dataset.prefetch(tf.data.AUTOTUNE)
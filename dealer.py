@@ -0,0 +1,120 @@
+#exact dealer odds...the chance of each final dealer total, worked out from the cards left in the shoe
+
+from shoe import CARD_TYPES, NUM_RANKS, card_code
+
+#the dealer's possible final results, in the order the distributions are returned
+OUTCOMES = [17, 18, 19, 20, 21, 'bust']
+BUST_INDEX = len(OUTCOMES) - 1
+
+#the four ten valued ranks (10, J, Q, K) play the same for the dealer, so the shoe is folded into ten card values
+#(ace, 2, ..., 9, ten) before anything is worked out.  VALUE_INDEX maps a rank code onto its value slot
+NUM_VALUES = 10
+VALUE_INDEX = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 9, 9, 9]
+
+
+#the remaining cards of each rank code, from the simulators' card_count dictionary of cards seen so far
+def remaining_from_card_count(card_count, num_decks):
+    remaining = [4 * num_decks] * NUM_RANKS
+    for card, seen in card_count.items():
+        remaining[card_code(card)] -= seen
+    return remaining
+
+
+def fold_values(remaining):
+    values = [0] * NUM_VALUES
+    for code, count in enumerate(remaining):
+        values[VALUE_INDEX[code]] += count
+    return tuple(values)
+
+
+class DealerOdds:
+    #works out the distribution of the dealer's final total by following every card the dealer could draw, without
+    #replacement, until they stand on 17 or more.  a soft 17 stands, like the simulators' dealers, unless
+    #hit_soft_17 is set.
+    #every partial dealer hand is cached on (hard total, holds an ace, cards left in the shoe), so asking again about
+    #the same shoe is a dictionary lookup, and hands later in the shoe reuse the sub-results they share with earlier
+    #ones.  the cache is dropped when it holds more than max_entries results
+    def __init__(self, max_entries=1000000, hit_soft_17=False):
+        self.max_entries = max_entries
+        self.hit_soft_17 = hit_soft_17
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def distribution(self, upcard, remaining, no_blackjack=False):
+        #the chance of each of OUTCOMES, given the rank code of the dealer's upcard and the unseen cards of each rank
+        #code (like CountTracker.remaining, which no longer includes the upcard).  the hole card comes out of the
+        #unseen cards.  a dealer blackjack counts as 21 unless no_blackjack is set, in which case the odds assume
+        #the dealer has already checked and doesn't have one
+        return self.distribution_from_values(VALUE_INDEX[upcard], fold_values(remaining), no_blackjack)
+
+    def distribution_from_values(self, up_value, counts, no_blackjack=False):
+        total_cards = sum(counts)
+        result = [0.0] * len(OUTCOMES)
+        weight = 0
+        hard = up_value + 1
+        for hole in range(NUM_VALUES):
+            count = counts[hole]
+            if count == 0:
+                continue
+            if no_blackjack and (up_value, hole) in ((0, 9), (9, 0)):
+                continue
+            weight += count
+            left = counts[:hole] + (count - 1,) + counts[hole + 1:]
+            finish = self.finish(hard + hole + 1, up_value == 0 or hole == 0, left, total_cards - 1)
+            for outcome in range(len(OUTCOMES)):
+                result[outcome] += count * finish[outcome]
+        if weight == 0:
+            raise ValueError('there are no cards left in the shoe for the hole card')
+        return tuple(probability / weight for probability in result)
+
+    def bust_probability(self, upcard, remaining, no_blackjack=False):
+        return self.distribution(upcard, remaining, no_blackjack)[BUST_INDEX]
+
+    def finish(self, hard, has_ace, counts, total_cards):
+        soft = has_ace and hard + 10 <= 21
+        total = hard + 10 if soft else hard
+        if total > 17 or (total == 17 and not (soft and self.hit_soft_17)):
+            outcome = BUST_INDEX if total > 21 else total - 17
+            return tuple(1.0 if index == outcome else 0.0 for index in range(len(OUTCOMES)))
+        key = (hard, has_ace, counts)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        if total_cards == 0:
+            #only possible in a nearly empty shoe, which the simulators never play
+            raise ValueError('the dealer ran out of cards')
+        result = [0.0] * len(OUTCOMES)
+        for value in range(NUM_VALUES):
+            count = counts[value]
+            if count == 0:
+                continue
+            left = counts[:value] + (count - 1,) + counts[value + 1:]
+            finish = self.finish(hard + value + 1, has_ace or value == 0, left, total_cards - 1)
+            chance = count / total_cards
+            for outcome in range(len(OUTCOMES)):
+                result[outcome] += chance * finish[outcome]
+        result = tuple(result)
+        if len(self.cache) >= self.max_entries:
+            self.cache.clear()
+        self.cache[key] = result
+        return result
+
+
+#one shared calculator, so every caller benefits from the same cache
+default_odds = DealerOdds()
+
+
+def dealer_distribution(upcard, remaining, no_blackjack=False):
+    return default_odds.distribution(upcard, remaining, no_blackjack)
+
+
+if __name__ == '__main__':
+    num_decks = 6
+    full_shoe = [4 * num_decks] * NUM_RANKS
+    print('upcard', *OUTCOMES, sep='\t')
+    for code in range(10):
+        odds = dealer_distribution(code, [count - (index == code) for index, count in enumerate(full_shoe)])
+        print(CARD_TYPES[code], *[f'{probability:.4f}' for probability in odds], sep='\t')
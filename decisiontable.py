@@ -0,0 +1,90 @@
+#distill a trained keras model into a decision table...the model's inputs are small whole numbers, so it can be
+#asked about every input once and then replaced by an array lookup that doesn't need tensorflow
+
+import os
+import numpy as np
+
+#the model's hit probability above which we hit (the same cutoff loadModel.py uses)
+HIT_THRESHOLD = 0.54
+
+#every input the models can see: the dealer's card the way find_total values it (an ace is 11), the player's total,
+#the true count and the number of hits so far.  inputs outside the grid are looked up at its nearest edge
+DEALER_CARDS = range(2, 12)
+PLAYER_TOTALS = range(4, 22)
+TRUE_COUNTS = range(-10, 11)
+NUM_HITS = range(0, 6)
+GRID_AXES = [DEALER_CARDS, PLAYER_TOTALS, TRUE_COUNTS, NUM_HITS]
+GRID_SHAPE = tuple(len(axis) for axis in GRID_AXES)
+
+#the features each saved model was trained on.  basic_model.keras only sees the dealer card and the player's
+#total (with hit fed in as 1, like model_decision in loadModel.py), so its table is the same for every count and
+#number of hits
+MODEL_LAYOUTS = {'basic_model.keras': 'basic', 'basic_model_highlow.keras': 'highlow'}
+
+
+class DecisionTable:
+    #the model's hit probability for every point of the grid, and the hit/stay decision with the threshold applied.
+    #predict and predict_on_batch take rows of (dealer card, player total, true count, hits so far) like the keras
+    #model in modelBlackJackSim.py, so the table can stand in for it
+    def __init__(self, probabilities, threshold=HIT_THRESHOLD):
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        if probabilities.shape != GRID_SHAPE:
+            raise ValueError(f'a decision table must have the shape {GRID_SHAPE}, not {probabilities.shape}')
+        self.probabilities = probabilities
+        self.threshold = threshold
+        self.decisions = probabilities > threshold
+
+    def index(self, dealer_card, player_total, true_count, num_hits):
+        #works for single values and for whole arrays of them
+        return tuple(np.clip(np.asarray(value, dtype=np.int64) - axis.start, 0, len(axis) - 1)
+                     for value, axis in zip([dealer_card, player_total, true_count, num_hits], GRID_AXES))
+
+    def probability(self, dealer_card, player_total, true_count=0, num_hits=0):
+        return self.probabilities[self.index(dealer_card, player_total, true_count, num_hits)]
+
+    def decide(self, dealer_card, player_total, true_count=0, num_hits=0):
+        return self.decisions[self.index(dealer_card, player_total, true_count, num_hits)]
+
+    def predict(self, features, **kwargs):
+        features = np.asarray(features)
+        return self.probability(*features.T)[:, None]
+
+    def predict_on_batch(self, features):
+        return self.predict(features)
+
+    def save(self, path):
+        np.savez(path, probabilities=self.probabilities, threshold=self.threshold)
+
+
+def load_decision_table(path):
+    saved = np.load(path)
+    return DecisionTable(saved['probabilities'], float(saved['threshold']))
+
+
+#every point of the grid as rows of (dealer card, player total, true count, hits so far), in the table's order
+def grid_features():
+    grids = np.meshgrid(*[np.array(axis) for axis in GRID_AXES], indexing='ij')
+    return np.stack([grid.ravel() for grid in grids], axis=1)
+
+
+#run the model once over the whole grid.  tensorflow is only imported here, so the tables can be used without it
+def distill_model(model_path, layout=None, threshold=HIT_THRESHOLD):
+    import tensorflow as tf
+    if layout is None:
+        layout = MODEL_LAYOUTS[os.path.basename(model_path)]
+    model = tf.keras.models.load_model(model_path)
+    features = grid_features()
+    if layout == 'basic':
+        inputs = np.stack([features[:, 0], features[:, 1], np.ones(len(features))], axis=1)
+    else:
+        inputs = features
+    probabilities = model.predict(inputs.astype(np.float32), batch_size=len(inputs), verbose=0)
+    return DecisionTable(probabilities.reshape(GRID_SHAPE), threshold)
+
+
+if __name__ == '__main__':
+    for model_path in MODEL_LAYOUTS:
+        if os.path.exists(model_path):
+            table_path = os.path.splitext(model_path)[0] + '_table.npz'
+            distill_model(model_path).save(table_path)
+            print(f'{model_path} -> {table_path}')
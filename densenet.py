@@ -0,0 +1,101 @@
+#numpy-only runtime for the trained Dense networks...exports a keras Sequential model's weights to an .npz file and
+#runs the same forward pass with a handful of matrix products, so using the model doesn't need tensorflow
+
+import os
+import numpy as np
+
+
+def relu(x):
+    return np.maximum(x, 0)
+
+
+def sigmoid(x):
+    #the same curve as 1 / (1 + exp(-x)), written so that large inputs can't overflow
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def softmax(x):
+    shifted = np.exp(x - x.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def linear(x):
+    return x
+
+
+#the keras activation names we can run
+ACTIVATIONS = {'linear': linear, 'relu': relu, 'sigmoid': sigmoid, 'softmax': softmax, 'tanh': np.tanh}
+
+
+class DenseNet:
+    #a stack of Dense layers, each one a (kernel, bias, activation name).  predict takes a batch of rows (an array or
+    #a dataframe with the training columns in order) and returns a column of outputs like keras does
+    def __init__(self, layers):
+        for kernel, bias, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f'unsupported activation {activation!r}, expected one of {sorted(ACTIVATIONS)}')
+        self.layers = [(np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32),
+                        ACTIVATIONS[activation]) for kernel, bias, activation in layers]
+        self.activations = [activation for kernel, bias, activation in layers]
+
+    def predict(self, features, **kwargs):
+        x = np.asarray(features, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+        for kernel, bias, activation in self.layers:
+            x = activation(x @ kernel + bias)
+        return x
+
+    def predict_on_batch(self, features):
+        return self.predict(features)
+
+    def predict_one(self, *features):
+        #the output for a single sample, as a plain float
+        return float(self.predict(features)[0, 0])
+
+    def summary(self):
+        for index, ((kernel, bias, activation), name) in enumerate(zip(self.layers, self.activations)):
+            print(f'dense_{index}: {kernel.shape[0]} -> {kernel.shape[1]} ({name})')
+
+    def save(self, path):
+        arrays = {}
+        for index, (kernel, bias, activation) in enumerate(self.layers):
+            arrays[f'kernel_{index}'] = kernel
+            arrays[f'bias_{index}'] = bias
+        np.savez(path, activations=np.array(self.activations), **arrays)
+
+
+def load_dense_net(path):
+    saved = np.load(path)
+    return DenseNet([(saved[f'kernel_{index}'], saved[f'bias_{index}'], str(activation))
+                     for index, activation in enumerate(saved['activations'])])
+
+
+#copy a keras Sequential model's Dense layers into a DenseNet.  Dropout only matters while training and Flatten
+#doesn't change our one dimensional inputs, so both are skipped
+def from_keras(model):
+    layers = []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ('Dropout', 'Flatten', 'InputLayer'):
+            continue
+        if kind != 'Dense':
+            raise ValueError(f'cannot export a {kind} layer, only Dense layers are supported')
+        weights = layer.get_weights()
+        bias = weights[1] if len(weights) > 1 else np.zeros(weights[0].shape[1], dtype=np.float32)
+        layers.append((weights[0], bias, layer.get_config()['activation']))
+    return DenseNet(layers)
+
+
+def export_model(model, path):
+    from_keras(model).save(path)
+
+
+if __name__ == '__main__':
+    #export every saved model next to itself (basic_model.keras -> basic_model.npz).  tensorflow is only needed here
+    import tensorflow as tf
+    for model_path in ['basic_model.keras', 'basic_model_highlow.keras']:
+        if os.path.exists(model_path):
+            export_path = os.path.splitext(model_path)[0] + '.npz'
+            export_model(tf.keras.models.load_model(model_path), export_path)
+            print(f'{model_path} -> {export_path}')
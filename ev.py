@@ -0,0 +1,97 @@
+#exact hit/stand expected values...how much a hand is worth per unit bet against the cards left in the shoe
+
+from collections import OrderedDict
+from dealer import BUST_INDEX, NUM_VALUES, VALUE_INDEX, default_odds, fold_values
+from handstate import BUST, SOFT_LIST, TOTAL_LIST, TRANSITION_LIST
+
+
+#the value of standing on total against a distribution of dealer outcomes (see dealer.py)
+def stand_value(total, odds):
+    ev = odds[BUST_INDEX]
+    for index, dealer_total in enumerate(range(17, 22)):
+        if total > dealer_total:
+            ev += odds[index]
+        elif total < dealer_total:
+            ev -= odds[index]
+    return ev
+
+
+class EVCalculator:
+    #works out the expected value of standing and of hitting (and then playing on as well as possible) for a hand
+    #state from handstate.py, the rank code of the dealer's upcard and the unseen cards of each rank code (like
+    #CountTracker.remaining).  the player's cards and the upcard should already be out of the unseen cards, and the
+    #dealer is assumed to have checked for blackjack, since the players never act when they have one.
+    #following every card the player could draw explodes quickly, so each result is kept in a least recently used
+    #cache of at most max_entries results, keyed on (total, soft, upcard, shoe composition).  that key is all that
+    #matters for the value of a hand, so hands that get to the same total in different ways share one entry
+    def __init__(self, max_entries=200000, dealer_odds=None):
+        self.max_entries = max_entries
+        self.dealer_odds = dealer_odds if dealer_odds is not None else default_odds
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stand_ev(self, state, upcard, remaining):
+        return self.values_stand_ev(state, VALUE_INDEX[upcard], fold_values(remaining))
+
+    def hit_ev(self, state, upcard, remaining):
+        return self.evaluate(state, VALUE_INDEX[upcard], fold_values(remaining))[0]
+
+    def should_hit(self, state, upcard, remaining):
+        hit, stand = self.evaluate(state, VALUE_INDEX[upcard], fold_values(remaining))
+        return hit > stand
+
+    def best_ev(self, state, upcard, remaining):
+        return max(self.evaluate(state, VALUE_INDEX[upcard], fold_values(remaining)))
+
+    def cache_info(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache), 'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    #the rest works on the upcard's value slot and the shoe folded into card values (see dealer.py)
+    def values_stand_ev(self, state, up_value, counts):
+        if state == BUST:
+            return -1.0
+        odds = self.dealer_odds.distribution_from_values(up_value, counts, no_blackjack=True)
+        return stand_value(TOTAL_LIST[state], odds)
+
+    def evaluate(self, state, up_value, counts):
+        #returns (ev of hitting, ev of standing)
+        if state == BUST:
+            return -1.0, -1.0
+        key = (TOTAL_LIST[state], SOFT_LIST[state], up_value, counts)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return cached
+        self.misses += 1
+        stand = self.values_stand_ev(state, up_value, counts)
+        hit = 0.0
+        total_cards = sum(counts)
+        for value in range(NUM_VALUES):
+            count = counts[value]
+            if count == 0:
+                continue
+            #value slots 0-9 are also the rank codes of an ace through a ten
+            next_state = TRANSITION_LIST[state][value]
+            if next_state == BUST:
+                hit -= count / total_cards
+                continue
+            left = counts[:value] + (count - 1,) + counts[value + 1:]
+            hit += count / total_cards * max(self.evaluate(next_state, up_value, left))
+        result = (hit, stand)
+        self.cache[key] = result
+        if len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return result
+
+
+#one shared calculator, so every caller benefits from the same cache
+default_calculator = EVCalculator()
@@ -0,0 +1,201 @@
+#vectorized evaluation of simulated hands...win/loss/push overall, by the dealer's upcard and by the player's
+#initial hand, and the blackjack rates, all from one groupby over long-format hands (one row per player per hand)
+#instead of walking the dataframe row by row
+
+import os
+import numpy as np
+import pandas as pd
+from shoe import CARD_TYPES
+
+#the dealer's card the way blackjackdata.csv writes it, in rank code order (see shoe.py)
+DEALER_CARDS = [str(card) for card in CARD_TYPES]
+RESULT_NAMES = ['win', 'loss', 'push']
+#the columns group_counts adds up for every (dealer card, initial hand)
+COUNT_COLUMNS = RESULT_NAMES + ['player_blackjack', 'dealer_21']
+
+
+def dealer_card_column(cards):
+    #the dealer's cards as a categorical in card order.  a dataframe column (read from blackjackdata.csv) holds the
+    #labels, even when pandas reads a chunk without any face cards in as integers, so it is mapped by its labels
+    #like dataset.records_from_csv does.  only the numpy columns of records and datasets hold rank codes
+    if isinstance(cards, pd.Series):
+        return pd.Categorical(cards.astype(str), categories=DEALER_CARDS)
+    cards = np.asarray(cards)
+    if cards.dtype.kind in 'iu':
+        return pd.Categorical.from_codes(cards, categories=DEALER_CARDS)
+    return pd.Categorical(cards.astype(str), categories=DEALER_CARDS)
+
+
+#one row per player per hand from the old wide csv, where every hand was one row and the players' initial values,
+#hits and results were list strings like "[12, 20, 9]".  the lists are split for the whole column at once
+def explode_wide(df):
+    lists = {column: df[column].astype(str).str.strip('[]').str.split(',')
+             for column in ['player_initial_value', 'hit', 'results']}
+    wide = pd.DataFrame({'dealer_card': df['dealer_card'], 'dealer_value': df['dealer_value'],
+                         'dealer_bust': df['dealer_bust'], **lists})
+    long = wide.explode(['player_initial_value', 'hit', 'results'], ignore_index=True)
+    return pd.DataFrame({'dealer_card': long['dealer_card'],
+                         'dealer_value': long['dealer_value'].astype(np.int64),
+                         'dealer_bust': long['dealer_bust'].astype(np.int64),
+                         'init_hand': long['player_initial_value'].astype(np.int64),
+                         'hit': long['hit'].astype(np.int64),
+                         'result': long['results'].astype(np.float64)})
+
+
+#read simulated hands from a binary dataset (see dataset.py), a long-format blackjackdata.csv or the old wide csv
+def load_hands(path='blackjackdata.csv'):
+    if os.path.isdir(path):
+        from dataset import open_dataset
+        fields = ['dealer_card', 'dealer_value', 'init_hand', 'result']
+        #the dataset keeps rank codes, which become the same card labels a csv has
+        shards = [pd.DataFrame({field: dealer_card_column(records[field]) if field == 'dealer_card' else records[field]
+                                for field in fields})
+                  for records in open_dataset(path).iter_shards(fields)]
+        return pd.concat(shards, ignore_index=True) if shards else pd.DataFrame(columns=fields)
+    df = pd.read_csv(path, index_col=0)
+    if 'results' in df.columns:
+        return explode_wide(df)
+    return df
+
+
+#the single pass: one row per (dealer card, initial hand) with how many of those hands were won, lost and pushed,
+#how many were player blackjacks (a two card 21) and how many times the dealer finished on 21
+def group_counts(hands):
+    result = np.sign(np.asarray(hands['result'], dtype=np.float64))
+    init_hand = np.asarray(hands['init_hand'])
+    flags = pd.DataFrame({'dealer_card': dealer_card_column(hands['dealer_card']), 'init_hand': init_hand,
+                          'win': result > 0, 'loss': result < 0, 'push': result == 0,
+                          'player_blackjack': init_hand == 21,
+                          'dealer_21': np.asarray(hands['dealer_value']) == 21})
+    return flags.groupby(['dealer_card', 'init_hand'], observed=True)[COUNT_COLUMNS].sum().astype(np.int64)
+
+
+def with_percentages(counts):
+    table = counts[RESULT_NAMES].copy()
+    table.insert(0, 'hands', table.sum(axis=1))
+    for name in RESULT_NAMES:
+        table[name + '_percent'] = (100 * table[name] / table['hands'].where(table['hands'] > 0)).fillna(0).round(2)
+    return table
+
+
+#every table at once from the grouped counts: overall, by dealer card, by initial hand, and the blackjack rates.
+#the counts have a row per player per hand, so the dealer's 21s are counted players times...they are divided by the
+#number of players at the table (every hand has the same number) and the dealer's rate is taken over hands
+def summarize(counts, players=1):
+    totals = counts.sum()
+    rows = int(totals[RESULT_NAMES].sum())
+    hands = rows / players
+    overall = with_percentages(totals.to_frame().T)
+    overall.index = ['all']
+    by_dealer_card = with_percentages(counts.groupby(level='dealer_card', observed=True).sum())
+    by_initial_hand = with_percentages(counts.groupby(level='init_hand').sum())
+    blackjacks = pd.DataFrame({'count': [int(totals['player_blackjack']), int(round(totals['dealer_21'] / players))],
+                               'out_of': [rows, hands]}, index=['player', 'dealer'])
+    blackjacks['percent'] = (100 * blackjacks['count'] / blackjacks.pop('out_of')).fillna(0.0)
+    return {'overall': overall, 'by_dealer_card': by_dealer_card, 'by_initial_hand': by_initial_hand,
+            'blackjacks': blackjacks}
+
+
+def evaluate(hands, players=1):
+    return summarize(group_counts(hands), players)
+
+
+def report(stats):
+    for name, table in stats.items():
+        print(name.replace('_', ' '))
+        print(table.to_string())
+        print('')
+
+
+#the online version of group_counts.  fixed-size arrays of counts per (dealer upcard, initial total, true count) are
+#fed hand records a round, a shard or a file chunk at a time, so statistics over billions of hands never need the
+#hands themselves.  counts only ever add, so accumulators from separate shards or processes merge exactly, in any
+#order.  true counts outside MIN_COUNT..MAX_COUNT are counted at the nearest end
+MAX_TOTAL = 21
+MIN_COUNT = -10
+MAX_COUNT = 10
+STATS_SHAPE = (len(DEALER_CARDS), MAX_TOTAL + 1, MAX_COUNT - MIN_COUNT + 1, len(COUNT_COLUMNS))
+
+
+class HandStats:
+    def __init__(self, counts=None):
+        self.counts = np.zeros(STATS_SHAPE, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        if self.counts.shape != STATS_SHAPE:
+            raise ValueError(f'hand stats must have the shape {STATS_SHAPE}, not {self.counts.shape}')
+
+    def update(self, hands):
+        #hands is anything with the record columns: a structured array (see records.py), a Dataset or a dataframe
+        #chunk of blackjackdata.csv.  hands without a true_count column are counted at a true count of 0
+        if len(hands['result']) == 0:
+            return self
+        dealer = dealer_card_column(hands['dealer_card']).codes.astype(np.int64)
+        init_hand = np.asarray(hands['init_hand'], dtype=np.int64)
+        try:
+            true_count = np.clip(np.asarray(hands['true_count'], dtype=np.int64), MIN_COUNT, MAX_COUNT) - MIN_COUNT
+        except (KeyError, ValueError):
+            true_count = np.full(len(init_hand), -MIN_COUNT)
+        result = np.sign(np.asarray(hands['result'], dtype=np.float64))
+        flags = [result > 0, result < 0, result == 0, init_hand == 21, np.asarray(hands['dealer_value']) == 21]
+        cells = (dealer * STATS_SHAPE[1] + init_hand) * STATS_SHAPE[2] + true_count
+        num_cells = STATS_SHAPE[0] * STATS_SHAPE[1] * STATS_SHAPE[2]
+        flat = self.counts.reshape(num_cells, len(COUNT_COLUMNS))
+        for column, flag in enumerate(flags):
+            flat[:, column] += np.bincount(cells[flag], minlength=num_cells)
+        return self
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return HandStats(self.counts + other.counts)
+
+    def __len__(self):
+        return int(self.counts[..., :len(RESULT_NAMES)].sum())
+
+    def grouped(self):
+        #the same table group_counts builds from the hands, so summarize works on it unchanged
+        by_hand = self.counts.sum(axis=2).reshape(-1, len(COUNT_COLUMNS))
+        index = pd.MultiIndex.from_product([pd.CategoricalIndex(DEALER_CARDS, categories=DEALER_CARDS),
+                                            range(MAX_TOTAL + 1)], names=['dealer_card', 'init_hand'])
+        counts = pd.DataFrame(by_hand, index=index, columns=COUNT_COLUMNS)
+        return counts[counts[RESULT_NAMES].sum(axis=1) > 0]
+
+    def summarize(self, players=1):
+        stats = summarize(self.grouped(), players)
+        by_count = self.counts.sum(axis=(0, 1))
+        true_counts = pd.DataFrame(by_count, index=pd.Index(range(MIN_COUNT, MAX_COUNT + 1), name='true_count'),
+                                   columns=COUNT_COLUMNS)
+        stats['by_true_count'] = with_percentages(true_counts[true_counts[RESULT_NAMES].sum(axis=1) > 0])
+        return stats
+
+    def save(self, path):
+        np.save(path, self.counts)
+
+
+def load_stats(path):
+    return HandStats(np.load(path))
+
+
+#accumulate a file without holding it: a .dataset a shard at a time, or a csv chunk_size rows at a time
+def stats_from_file(path='blackjackdata.csv', chunk_size=1000000):
+    stats = HandStats()
+    if os.path.isdir(path):
+        from dataset import open_dataset
+        for records in open_dataset(path).iter_shards():
+            stats.update(records)
+        return stats
+    for chunk in pd.read_csv(path, index_col=0, chunksize=chunk_size):
+        stats.update(explode_wide(chunk) if 'results' in chunk.columns else chunk)
+    return stats
+
+
+if __name__ == '__main__':
+    import sys
+    #the accumulator reads the file a chunk at a time, so this works on files that don't fit in memory.  the second
+    #argument is the number of players the hands were simulated with
+    report(stats_from_file(sys.argv[1] if len(sys.argv) > 1 else 'blackjackdata.csv')
+           .summarize(int(sys.argv[2]) if len(sys.argv) > 2 else 1))
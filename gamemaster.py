@@ -1,7 +1,10 @@
+import asyncio
 import socket
 import threading
 from collections import defaultdict
 import select
+from handstate import EMPTY, TOTALS, add_card, is_bust
+from shoe import NAME_CODES
 
 # GM sends "table;cozmo;[count]" before each player turn
 # NOTE: GM always sends response to message, so you must wait for a response before you can send your next card
@@ -34,6 +37,11 @@ import select
 # Dealer sends card value messages if they have to until they go bust: "table;dealer;cardNumber;cardValue"
 # Dealer sends stay message: "table;dealer;-1;-1"
 # Message with final dealer total: "table;dealer;final;value"
+# GM answers a message it can't handle with an error, sent only to the connection that sent it: "table;ERROR;reason"
+
+# Framing: every message may end with a newline ("table;cozmoName;position\n"). A connection that sends newlines gets
+# its messages split on them however TCP groups the bytes, and gets every reply newline terminated too. A connection
+# that never sends one is an older client: each read is taken as one whole message and replies are sent unterminated
 
 # This is mostly done, but I still need to iron out a few kinks before it works. I also need to test.
 
@@ -43,53 +51,24 @@ class Game:
         self.cards_played = [0] * 13
         self.num_decks = 0
         self.player_hands = defaultdict(list)
+        self.hand_states = defaultdict(lambda: EMPTY)
         self.order = {}
         self.current_position = 1
         self.table_id = table_id
         self.message = ""
 
     def __calculate_hand_total__(self, player_name: str) -> int:
-        cards = self.player_hands[player_name]
-        total = 0
-        count_aces = 0
-
-        for card in cards:
-            match card:
-                case "Ace":
-                    count_aces += 1
-                case "Two":
-                    total += 2
-                case "Three":
-                    total += 3
-                case "Four":
-                    total += 4
-                case "Five":
-                    total += 5
-                case "Six":
-                    total += 6
-                case "Seven":
-                    total += 7
-                case "Eight":
-                    total += 8
-                case "Nine":
-                    total += 9
-                case "Ten":
-                    total += 10
-                case "Jack":
-                    total += 10
-                case "Queen":
-                    total += 10
-                case "King":
-                    total += 10
-
-        if total > 21 or total + count_aces > 21:
+        """Returns the player's hand total (one ace counts as 11 when it fits), or -1 if they went bust"""
+        state = self.hand_states[player_name]
+
+        if is_bust(state):
             return -1
 
-        # TODO: Deal with aces
+        return int(TOTALS[state])
 
     def add_player(self, name: str, position: int):
-        if position not in self.order:
-            self.order[position] = name
+        # A player that connects again to its own seat is acknowledged again
+        if self.order.setdefault(position, name) == name:
             self.message = f"{self.table_id};{name};CONNECTED"
 
     def update_count(self, cozmo_name: str, card_value: str, card_number: int):
@@ -124,6 +103,10 @@ class Game:
 
         # Add card to player's hand
         self.player_hands[cozmo_name].append(card_value)
+        if card_value in NAME_CODES:
+            self.hand_states[cozmo_name] = add_card(
+                self.hand_states[cozmo_name], NAME_CODES[card_value]
+            )
 
         if (
             cozmo_name == "dealer"
@@ -149,13 +132,14 @@ class Game:
             self.message = f"{self.table_id};{self.order[self.current_position]};{self.cards_played}"
 
     def hand_start(self, num_decks) -> None:
-        self.num_decks = num_decks
-        self.player_hands = []
+        self.num_decks = int(num_decks)
+        self.player_hands = defaultdict(list)
+        self.hand_states = defaultdict(lambda: EMPTY)
 
         # TODO: Check if 20 cards is a good number to stop at
         if sum(self.cards_played) + 20 > self.num_decks * 52:
             game_status = "new"
-            self.cards_played = []
+            self.cards_played = [0] * 13
         else:
             game_status = "same"
 
@@ -167,13 +151,56 @@ class Game:
         self.message = f"{self.table_id};BLACKJACK"
 
 
+class MessageParser:
+    """Splits one connection's byte stream into messages. In "newline" framing any number of messages can arrive
+    in one read, or one message across several reads, and the unfinished tail is kept for the next read. "legacy"
+    takes every read as exactly one message, the way the game master always has. "auto" is legacy until the
+    connection sends its first newline and newline framing from then on, so it relies on a framed client's first
+    message arriving in one read (servers whose clients all frame their messages should use "newline")"""
+
+    # An unfinished message longer than this means the client isn't speaking the protocol
+    MAX_MESSAGE = 1 << 16
+
+    def __init__(self, framing: str = "auto") -> None:
+        if framing not in ("auto", "newline", "legacy"):
+            raise ValueError(f"unknown framing {framing!r}, expected 'auto', 'newline' or 'legacy'")
+        self.framing = framing
+        self.buffer = bytearray()
+
+    @property
+    def framed(self) -> bool:
+        """Whether this connection's messages (and so its replies) are newline terminated"""
+        return self.framing == "newline"
+
+    def feed(self, data: bytes) -> list:
+        """Returns every message completed by data"""
+        if self.framing == "auto" and b"\n" in data:
+            self.framing = "newline"
+        if not self.framed:
+            return [data.decode()]
+
+        self.buffer += data
+        *complete, rest = self.buffer.split(b"\n")
+        if len(rest) > MessageParser.MAX_MESSAGE:
+            raise ValueError(f"message longer than {MessageParser.MAX_MESSAGE} bytes")
+        self.buffer = bytearray(rest)
+        return [line.decode().rstrip("\r") for line in complete if line.strip()]
+
+
 class GameMaster:
     CONNECTION_BACKLOG = 40
 
-    def __init__(self, port: int) -> None:
+    def __init__(self, port: int, framing: str = "auto") -> None:
         self.port = port
+        self.framing = framing
         self.games = {}
         self.clients = []
+        # Each connection's MessageParser, which also knows whether its replies are newline terminated
+        self.parsers = {}
+        # Which connections are at each table, and the tables each connection is at, so a table's messages only go
+        # to its own members and a member that disconnects can be taken off every table it joined
+        self.tables = {}
+        self.client_tables = defaultdict(set)
         self.lock = threading.Lock()
 
     def __initialize_server__(self) -> None:
@@ -187,22 +214,54 @@ class GameMaster:
         # Set the server socket to non-blocking mode
         self.server_socket.setblocking(False)
 
+    def __subscribe__(self, table: str, client) -> None:
+        """Adds a connection to a table's members"""
+        self.tables.setdefault(table, set()).add(client)
+        self.client_tables[client].add(table)
+
+    def __remove_client__(self, client) -> None:
+        """Forgets a connection and takes it off every table it joined (callers hold the lock)"""
+        if client in self.clients:
+            self.clients.remove(client)
+        self.parsers.pop(client, None)
+        for table in self.client_tables.pop(client, ()):
+            members = self.tables[table]
+            members.discard(client)
+            if not members:
+                del self.tables[table]
+
     def __broadcast__(self, game):
+        data = self.games[game].message.encode()
         with self.lock:
-            for client in self.clients:
+            for client in list(self.tables.get(game, ())):
                 try:
-                    client.sendall(self.games[game].message.encode())
+                    client.sendall(data + b"\n" if self.parsers[client].framed else data)
                 except socket.error as e:
                     # Handle errors, e.g., if the client disconnected
                     print(f"Error sending response to a client: {e}")
-                    self.clients.remove(client)
+                    self.__remove_client__(client)
                     client.close()
 
-    def __handle_message__(self, message: str) -> None:
+    def __handle_message__(self, message: str, client=None) -> None:
+        """Updates the table the message is for and sends the table's response to its members. The sender joins
+        the table, so it always gets the response to its own message"""
         args = message.split(";")
+        table = args[0]
+
+        # Only a message this one sets is sent out, never the table's previous one again
+        if table in self.games:
+            self.games[table].message = ""
+
+        # Start message (checked first, it has as many parts as an add player message)
+        if len(args) == 3 and args[1] == "START":
+            table, _, num_decks = args
+
+            if table not in self.games:
+                raise ValueError(f"no game at table {table}")
+            self.games[table].hand_start(num_decks)
 
         #  Add player message
-        if len(args) == 3:
+        elif len(args) == 3:
             table, cozmo, position = message.split(";")
 
             if table not in self.games:
@@ -210,30 +269,47 @@ class GameMaster:
                 self.games[table] = new_game
 
             self.games[table].add_player(cozmo, position)
-
-        # Start message
-        elif len(args) == 3 and args[1] == "START":
-            table, _, num_decks = args
-
-            if table in self.games:
-                self.games[table].hand_start(num_decks)
+            if self.games[table].message == "":
+                raise ValueError(f"position {position} is taken by {self.games[table].order[position]}")
 
         # Card value message
         elif len(args) == 4:
             table, cozmo_name, card_number, card_value = args
 
-            if table in self.games:
-                if card_number == "-1" and card_number == "-1":
-                    self.games[table].stay(cozmo_name)
-                else:
-                    self.games[table].update_count(
-                        cozmo_name, card_value, int(card_number)
-                    )
+            if table not in self.games:
+                raise ValueError(f"no game at table {table}")
+            if card_number == "-1" and card_number == "-1":
+                self.games[table].stay(cozmo_name)
+            else:
+                self.games[table].update_count(
+                    cozmo_name, card_value, int(card_number)
+                )
+
+        else:
+            raise ValueError(f"unrecognised message {message}")
+
+        if client is not None and table in self.games:
+            with self.lock:
+                self.__subscribe__(table, client)
 
         # Send game's message
         if table in self.games and self.games[table].message != "":
             self.__broadcast__(table)
 
+    def __dispatch__(self, message: str, client) -> None:
+        """Handles one message. A message that can't be handled is logged and answered with an error to its sender
+        alone, so one bad message neither drops the connection nor stops the server"""
+        try:
+            self.__handle_message__(message, client)
+        except Exception as e:
+            print(f"Error handling {message!r}: {e!r}")
+            reason = " ".join(str(e).replace(";", " ").split()) or type(e).__name__
+            self.__reply__(client, f"{message.split(';')[0]};ERROR;{reason}".encode())
+
+    def __reply__(self, client, data: bytes) -> None:
+        """Sends a message to one connection (a send error is left to the caller, which drops the connection)"""
+        client.sendall(data + b"\n" if self.parsers[client].framed else data)
+
     def __listen_for_connections__(self) -> None:
         while True:
             # Use select to check for readable sockets
@@ -247,19 +323,21 @@ class GameMaster:
                     client_socket.setblocking(False)
                     with self.lock:
                         self.clients.append(client_socket)
+                        self.parsers[client_socket] = MessageParser(self.framing)
                 else:
                     # Check if the socket is ready for reading
                     if sock in select.select([sock], [], [])[0]:
                         # Receive messages and handle them
                         try:
-                            message = sock.recv(4096).decode()
-                            if message:
-                                self.__handle_message__(message)
-                        except socket.error as e:
+                            data = sock.recv(4096)
+                            if data:
+                                for message in self.parsers[sock].feed(data):
+                                    self.__dispatch__(message, sock)
+                        except (socket.error, ValueError) as e:
                             # Handle disconnections or errors
                             print(f"Error reading from {sock.getpeername()}: {e}")
                             with self.lock:
-                                self.clients.remove(sock)
+                                self.__remove_client__(sock)
                             sock.close()
 
     def listen(self) -> None:
@@ -277,6 +355,101 @@ class GameMaster:
         self.accepting_thread.start()
 
 
+class AsyncGameMaster(GameMaster):
+    """The same table protocol as GameMaster, served with asyncio: one coroutine per connection and non-blocking,
+    buffered writes. Connections wait on the event loop's selector and a table's messages only go to its members,
+    so a message costs the same whether ten or ten thousand clients are connected, and a client that stops reading
+    can't hold up the others"""
+
+    CONNECTION_BACKLOG = 1024
+    # A client whose unsent data grows past this many bytes has stopped reading and is dropped
+    WRITE_BUFFER_LIMIT = 1 << 20
+    READ_SIZE = 4096
+
+    def __init__(self, port: int, host: str = "localhost", framing: str = "auto") -> None:
+        super().__init__(port, framing)
+        self.host = host
+        self.clients = set()
+        # Replies for newline framed connections wait here until the end of the event loop tick, so everything a
+        # connection is sent while handling one read goes out in a single write
+        self.pending = {}
+        self.flush_scheduled = False
+
+    def __drop_client__(self, writer: asyncio.StreamWriter) -> None:
+        """Forgets a client, takes it off its tables and closes its connection"""
+        self.__remove_client__(writer)
+        self.pending.pop(writer, None)
+        writer.close()
+
+    def __broadcast__(self, game):
+        data = self.games[game].message.encode()
+        for writer in list(self.tables.get(game, ())):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > AsyncGameMaster.WRITE_BUFFER_LIMIT:
+                print(f"Dropping client {writer.get_extra_info('peername')}")
+                self.__drop_client__(writer)
+                continue
+            self.__reply__(writer, data)
+
+    def __reply__(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        """Queues a message for one client, framed ones until the end of this tick"""
+        if writer.is_closing():
+            return
+        if not self.parsers[writer].framed:
+            # Older clients can't split joined messages, so theirs go out one write each
+            writer.write(data)
+            return
+        self.pending.setdefault(writer, []).append(data + b"\n")
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.__flush__)
+
+    def __flush__(self) -> None:
+        """Writes every connection's replies from this tick at once (writes only queue the data, the event loop
+        sends it when the socket is writable)"""
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, {}
+        for writer, chunks in pending.items():
+            if not writer.is_closing():
+                writer.write(b"".join(chunks))
+
+    async def __handle_connection__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Reads and handles one client's messages until it disconnects"""
+        addr = writer.get_extra_info("peername")
+        print(f"Accepted connection from {addr}")
+        self.clients.add(writer)
+        parser = self.parsers[writer] = MessageParser(self.framing)
+        try:
+            while True:
+                data = await reader.read(AsyncGameMaster.READ_SIZE)
+                if not data:
+                    break
+                for message in parser.feed(data):
+                    self.__dispatch__(message, writer)
+        except (ConnectionError, ValueError) as e:
+            print(f"Error reading from {addr}: {e}")
+        finally:
+            self.__drop_client__(writer)
+
+    async def serve(self) -> None:
+        """Accepts connections and serves them until cancelled"""
+        self.server = await asyncio.start_server(
+            self.__handle_connection__,
+            self.host,
+            self.port,
+            backlog=AsyncGameMaster.CONNECTION_BACKLOG,
+        )
+
+        print(f"GM listening on {self.server.sockets[0].getsockname()}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def listen(self) -> None:
+        """Runs the server on an event loop in this thread"""
+        asyncio.run(self.serve())
+
+
 if __name__ == "__main__":
-    gm = GameMaster(3306)
+    gm = AsyncGameMaster(3306)
     gm.listen()
@@ -0,0 +1,89 @@
+#finite-state hand representation shared by the simulators and the game master
+
+import numpy as np
+from shoe import NUM_RANKS, card_code
+
+#a hand is just a small integer state.  the state remembers the hard total (every ace counted as 1), whether the
+#hand holds an ace, and how many cards it has (3 means 3 or more, which is all we need to spot a blackjack).
+#every bust hand goes to the single BUST state.  adding a card is then one lookup in TRANSITIONS[state, rank_code],
+#and the total, softness, blackjack and bust checks are lookups in the arrays below
+MAX_HARD = 21
+MAX_CARDS = 3
+NUM_STATES = (MAX_HARD + 1) * 2 * (MAX_CARDS + 1) + 1
+BUST = NUM_STATES - 1
+EMPTY = 0
+
+#the value of each rank code, with aces counted as 1
+RANK_VALUES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10]
+
+
+def encode_state(hard, has_ace, num_cards):
+    if hard > MAX_HARD:
+        return BUST
+    return (min(num_cards, MAX_CARDS) * 2 + int(has_ace)) * (MAX_HARD + 1) + hard
+
+
+def build_tables():
+    transitions = np.full((NUM_STATES, NUM_RANKS), BUST, dtype=np.int16)
+    totals = np.zeros(NUM_STATES, dtype=np.int8)
+    soft = np.zeros(NUM_STATES, dtype=bool)
+    card_counts = np.zeros(NUM_STATES, dtype=np.int8)
+    #the bust state keeps its own total above 21 so that "total > 21" checks still work on it
+    totals[BUST] = MAX_HARD + 1
+    card_counts[BUST] = MAX_CARDS
+    for num_cards in range(MAX_CARDS + 1):
+        for has_ace in (False, True):
+            for hard in range(MAX_HARD + 1):
+                state = encode_state(hard, has_ace, num_cards)
+                is_soft = has_ace and hard + 10 <= 21
+                totals[state] = hard + 10 if is_soft else hard
+                soft[state] = is_soft
+                card_counts[state] = num_cards
+                for code in range(NUM_RANKS):
+                    transitions[state, code] = encode_state(hard + RANK_VALUES[code], has_ace or code == 0, num_cards + 1)
+    blackjack = (card_counts == 2) & (totals == 21)
+    busted = np.zeros(NUM_STATES, dtype=bool)
+    busted[BUST] = True
+    return transitions, totals, soft, card_counts, blackjack, busted
+
+
+#numpy versions of the tables, for indexing whole arrays of hands at once
+TRANSITIONS, TOTALS, SOFT, CARD_COUNTS, BLACKJACK, BUSTED = build_tables()
+
+#plain list versions, which are faster than numpy scalars for the one-hand-at-a-time simulators
+TRANSITION_LIST = TRANSITIONS.tolist()
+TOTAL_LIST = TOTALS.tolist()
+SOFT_LIST = SOFT.tolist()
+
+
+def add_card(state, code):
+    return TRANSITION_LIST[state][code]
+
+
+def hand_state(hand):
+    state = EMPTY
+    for card in hand:
+        state = TRANSITION_LIST[state][card_code(card)]
+    return state
+
+
+#the total of a hand, counting one ace as 11 when it doesn't bust the hand (the same answer the simulators'
+#find_total has always given, including for bust hands)
+def find_total(hand):
+    state = EMPTY
+    hard = 0
+    for card in hand:
+        code = card_code(card)
+        state = TRANSITION_LIST[state][code]
+        hard += RANK_VALUES[code]
+    if state == BUST:
+        return hard
+    return TOTAL_LIST[state]
+
+
+def is_blackjack(state):
+    return bool(BLACKJACK[state])
+
+
+def is_bust(state):
+    return state == BUST
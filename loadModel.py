@@ -1,23 +1,22 @@
 #load a neural network model for blackjack
 
+import os
 import numpy as np
 import pandas as pd
-import random
-import matplotlib.pyplot as plt
-import seaborn as sns
-import sklearn.metrics as metrics
-from sklearn.model_selection import train_test_split
-from keras.models import Sequential
-from keras.layers import Dense, LSTM, Flatten, Dropout
-import tensorflow as tf
+from densenet import load_dense_net
 
 
 #let's load the model and continue our work...using the model to make cozmo's decisions
 #your model_decision function should obviously include the features that you used to 
 #determine the model output.  my feature list was relatively simple.
 
-#first, load the model
-new_model = tf.keras.models.load_model('basic_model.keras')
+#first, load the model...the numpy export (see densenet.py) gives the same predictions without loading tensorflow,
+#so use it when ModelTraining.py has written one
+if os.path.exists('basic_model.npz'):
+    new_model = load_dense_net('basic_model.npz')
+else:
+    import tensorflow as tf
+    new_model = tf.keras.models.load_model('basic_model.keras')
 
 #we can verify that the model has the same summary info as the model that we saved previously.
 print(new_model.summary())
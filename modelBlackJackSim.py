@@ -1,60 +1,37 @@
+import os
 import numpy as np
 import pandas as pd
 import random
 import matplotlib.pyplot as plt
 import seaborn as sns
+from shoe import Shoe
+from handstate import find_total
+from counting import CountTracker
 from ModelDesision import model_decision
-import tensorflow as tf
-new_model = tf.keras.models.load_model('basic_model_highlow.keras')
+from decisiontable import HIT_THRESHOLD, load_decision_table
+from densenet import load_dense_net
 
-def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
+#use the model's decision table when it has been distilled (run decisiontable.py), which answers by array lookup
+#and doesn't need tensorflow at all, or else the numpy export of the network (run densenet.py)...otherwise load
+#the keras model itself
+model_table = 'basic_model_highlow_table.npz'
+model_weights = 'basic_model_highlow.npz'
+if os.path.exists(model_table):
+    new_model = load_decision_table(model_table)
+elif os.path.exists(model_weights):
+    new_model = load_dense_net(model_weights)
+else:
+    import tensorflow as tf
+    new_model = tf.keras.models.load_model('basic_model_highlow.keras')
+
+#one table played until every player is out of chips.  this is a generator: whenever a player has to decide, the
+#table pauses and yields that decision's features (dealer card, player total, true count, hits so far), and it
+#carries on once it is sent back True (hit) or False (stay).  that lets one caller decide for many tables at once.
+#when the table is done it returns how many hands each player lasted
+def play_table(num_decks = 6, num_players = 4, num_chips = 100, verbose = True):
     card_types = ['A', 2, 3, 4, 5, 6, 7, 8, 9, 10, 'J', 'Q', 'K']
-    card_counting_dict = {'A': -1, 2: 1, 3: 1, 4: 1, 5: 1, 6: 1, 7: 0, 8: 0, 9: 0, 10: -1, "J": -1, "Q": -1, "K": -1}
-
-    def make_shoe(num_decks, card_types):
-        new_shoe = []
-        for i in range(num_decks):
-            for j in range(4):
-                new_shoe.extend(card_types)
-        #Shuffle the cards
-        random.shuffle(new_shoe)
-        return new_shoe
-
-    def calculateCount(cards_delt):
-        current_count = 0
-        num_cards_taken = 0
-        total_decks = num_decks
-        for key in cards_delt:
-            current_count += card_counting_dict[key] * cards_delt[key]
-            num_cards_taken += cards_delt[key]
-        num_decks_left = (total_decks - (num_cards_taken // 52))
-        return current_count // num_decks_left 
-    
-    def find_total(hand):
-        face_cards = ['J', 'Q', 'K']
-        aces = 0
-        hand_value = 0
-        # a card will either be a face card, an ace, or an int
-        #for a face card add 10, for an int add the int value, for ace count it
-        # and determine its impact on the hand value at the end
-        for card in hand:
-            if card == 'A':
-                aces += 1
-            elif card in face_cards:
-                hand_value += 10
-            else: 
-                hand_value += card
-        # at this point we can determine the value in the hand with the aces
-        if aces == 0:
-            return hand_value
-        else:
-            hand_value += aces
-            if hand_value + 10 < 22:
-                return (hand_value + 10)
-            else:
-                return hand_value
-            
-    def play_hand(dealer_hand, player_hands, curr_player_results, shoe, card_count, player_chips):
+
+    def play_hand(dealer_hand, player_hands, curr_player_results, shoe, player_chips):
         dealer_bust = []
         #first, check if the dealer has blackjack.  that can only happen if the dealer has a total of 21, logically, and 
         #the game will be over before it really gets started...the players cannot hit
@@ -77,7 +54,7 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
             for player in range(num_players):
                 #the default is that they do not hit
                 num_hits = 0
-                current_count = calculateCount(card_count)
+                current_count = round(count_tracker.true_count())
                 
                 #check for blackjack so that the player wins
                 if (len(player_hands[player]) == 2) and (find_total(player_hands[player]) == 21):
@@ -85,12 +62,12 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
 
                 else:
                    # Can input different simualtions into this while loop
-                    while model_decision(new_model, find_total([dealer_hand[1]]), find_total(player_hands[player]), current_count, num_hits) :
+                    while (yield (find_total([dealer_hand[1]]), find_total(player_hands[player]), current_count, num_hits)):
                         #deal a card
-                        player_hands[player].append(shoe.pop(0))
+                        player_hands[player].append(shoe.draw_card())
                         
-                        #update our dictionary to include the new card
-                        card_count[player_hands[player][-1]] += 1
+                        #count the new card
+                        count_tracker.add_card(player_hands[player][-1])
                         
                         #note that the player decided to hit
                         num_hits += 1
@@ -106,15 +83,15 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
                             break
                         
         #next, the dealer takes their turn based on the rules
-        #first, the dealer will turn over their card, so we can count it and update our dictionary; this is the FIRST card they were dealt
-        card_count[dealer_hand[0]] += 1
+        #first, the dealer will turn over their card, so we can count it; this is the FIRST card they were dealt
+        count_tracker.add_card(dealer_hand[0])
         
         while find_total(dealer_hand) < 17:
             #the dealer takes a card
-            dealer_hand.append(shoe.pop(0))    
+            dealer_hand.append(shoe.draw_card())    
             
-            #update our dictionary for counting cards
-            card_count[dealer_hand[-1]] += 1
+            #count the dealer's new card
+            count_tracker.add_card(dealer_hand[-1])
         
         
         #this round is now complete, so we can determine the outcome...first, determine if the dealer went bust
@@ -146,7 +123,7 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
         
         #the hand is now complete, so we can return the results
         #we will return the results for each player
-        return curr_player_results, card_count
+        return curr_player_results
 #######################################################################################################
     player_chips = []
 
@@ -158,9 +135,9 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
     
     while len(player_chips):
         #Make the shoe of cards
-        shoe = make_shoe(num_decks, card_types)
-        #Make the dictonary for the card count
-        card_count = {'A':0, 2:0, 3:0, 4:0, 5:0, 6:0,7:0, 8:0, 9:0, 10:0, 'J':0, 'Q':0, 'K':0}
+        shoe = Shoe(num_decks)
+        #the running/true count, updated once per card (see counting.py)
+        count_tracker = CountTracker(num_decks)
         while len(shoe) > 40:
             if not len(player_chips):
                 break
@@ -172,26 +149,25 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
             player_hands = [ [] for player in range(num_players)]
             live_total = []
 
-            #deal the FIRST card to all players and update our card counting dictionary
+            #deal the FIRST card to all players and count them
             for player, hand in enumerate(player_hands):
-                player_hands[player].append(shoe.pop(0))
-                card_count[player_hands[player][-1]] += 1
+                player_hands[player].append(shoe.draw_card())
+                count_tracker.add_card(player_hands[player][-1])
                 
-            #dealer gets a card, and the card counting dictionary is NOT updated
-            dealer_hand.append(shoe.pop(0))
-            card_count[dealer_hand[-1]] += 1
+            #dealer gets a card, which is NOT counted until it is turned over
+            dealer_hand.append(shoe.draw_card())
             
-            #deal the SECOND card to all players and update our card counting dictionary
+            #deal the SECOND card to all players and count them
             for player, hand in enumerate(player_hands):
-                player_hands[player].append(shoe.pop(0))
-                card_count[player_hands[player][-1]] += 1
+                player_hands[player].append(shoe.draw_card())
+                count_tracker.add_card(player_hands[player][-1])
                 
             #the dealer gets a card, and our card counter will be updated with the card that is showing
-            dealer_hand.append(shoe.pop(0))
-            card_count[dealer_hand[-1]] += 1
+            dealer_hand.append(shoe.draw_card())
+            count_tracker.add_card(dealer_hand[-1])
 
             live_total.append(find_total(player_hands[player]))
-            player_results, card_count = play_hand(dealer_hand, player_hands, curr_player_results, shoe, card_count, player_chips)
+            player_results = yield from play_hand(dealer_hand, player_hands, curr_player_results, shoe, player_chips)
 
             for i in range(num_players):
                 if player_results[0,i] == -1:
@@ -207,16 +183,60 @@ def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
                     final_player_num_hands.append(player_num_hands[i])
                     deleted.append(i)
                     num_players -= 1
-            for i in deleted:
+            #pop from the back so the earlier indices stay put
+            for i in reversed(deleted):
                 player_chips.pop(i)
                 player_num_hands.pop(i)
                     
                 
-            print(player_num_hands)
-            print(player_chips)
+            if verbose:
+                print(player_num_hands)
+                print(player_chips)
 
-    print(final_player_num_hands)
+    return final_player_num_hands
+
+
+#play one table, asking the model about one decision at a time
+def modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 100):
+    table = play_table(num_decks, num_players, num_chips)
+    try:
+        features = next(table)
+        while True:
+            features = table.send(bool(model_decision(new_model, *features)))
+    except StopIteration as done:
+        print(done.value)
+
+
+#play num_tables tables at once.  every step collects the decision each paused table is waiting on, runs them all
+#through the model in a single batch, and sends every table its answer, so the model is called once per step
+#instead of once per decision.  returns each table's hands lasted per player
+def batchedModelSim(num_tables = 64, num_decks = 6, num_players = 4, num_chips = 100):
+    tables = [play_table(num_decks, num_players, num_chips, verbose = False) for i in range(num_tables)]
+    results = [None] * num_tables
+    waiting = []
+    for i, table in enumerate(tables):
+        try:
+            waiting.append((i, next(table)))
+        except StopIteration as done:
+            results[i] = done.value
+
+    while waiting:
+        features = np.array([features for i, features in waiting], dtype = np.float32)
+        hits = new_model.predict_on_batch(features).reshape(-1) > HIT_THRESHOLD
+        still_waiting = []
+        for (i, features), hit in zip(waiting, hits):
+            try:
+                still_waiting.append((i, tables[i].send(bool(hit))))
+            except StopIteration as done:
+                results[i] = done.value
+        waiting = still_waiting
+
+    return results
 
-        
 
-modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 20)
\ No newline at end of file
+#set batched to False to play a single table with model_decision
+batched = True
+if batched:
+    print(batchedModelSim(num_tables = 64, num_decks = 6, num_players = 4, num_chips = 20))
+else:
+    modelBlackJackSim(num_decks = 6, num_players = 4, num_chips = 20)
\ No newline at end of file
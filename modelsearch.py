@@ -0,0 +1,162 @@
+#hyperparameter search for the ModelTraining.py network...trains many layer/optimizer/epoch configurations at once
+#on a process pool and caches each one's test AUC and best-threshold accuracy, so re-running a sweep only trains
+#the configurations it hasn't seen on this data before
+#
+#   python modelsearch.py              (the default sweep on blackjackdata.dataset or blackjackdata.csv)
+
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+CACHE_PATH = 'model_search_cache.json'
+
+#the network ModelTraining.py trains.  layers are [units, activation] pairs (None is keras' linear default) and
+#always end in the single sigmoid output
+BASELINE_CONFIG = {'layers': [[16, 'relu'], [128, None], [32, 'softmax'], [8, None]],
+                   'optimizer': 'sgd', 'epochs': 20, 'batch_size': 256}
+
+#the thresholds ModelTraining.py tries when it looks for the best accuracy
+THRESHOLDS = [i / 100 for i in range(35, 60)]
+
+
+#every combination of the given hidden layer stacks, optimizers and epoch counts
+def grid(layer_options, optimizers=('sgd',), epochs=(20,), batch_size=256):
+    return [{'layers': [list(layer) for layer in layers], 'optimizer': optimizer, 'epochs': epoch_count,
+             'batch_size': batch_size}
+            for layers, optimizer, epoch_count in itertools.product(layer_options, optimizers, epochs)]
+
+
+DEFAULT_SWEEP = [BASELINE_CONFIG] + grid([[[16, 'relu'], [8, 'relu']],
+                                          [[32, 'relu'], [32, 'relu'], [8, 'relu']],
+                                          [[64, 'tanh'], [16, 'tanh']]],
+                                         optimizers=('sgd', 'adam'), epochs=(10, 20))
+
+
+def dataset_hash(*arrays):
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+#the cache key: the data's hash and the configuration, so a result is reused only for the same data and network
+def config_key(config, data_hash):
+    return hashlib.sha256((data_hash + json.dumps(config, sort_keys=True)).encode()).hexdigest()
+
+
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as cache_file:
+        return json.load(cache_file)
+
+
+def save_cache(cache, path=CACHE_PATH):
+    #write a new file and swap it in, so a sweep that is stopped halfway never leaves a broken cache
+    with open(path + '.tmp', 'w') as cache_file:
+        json.dump(cache, cache_file, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+#the same features and split ModelTraining.py trains on, from a binary dataset (see dataset.py) or the csv.  the
+#split is seeded so that the data hash, and with it the cache, stays the same between runs
+def load_training_data(path=None, test_size=0.2, seed=0):
+    from datastream import encode, encode_dataset
+    if path is None:
+        path = 'blackjackdata.dataset' if os.path.isdir('blackjackdata.dataset') else 'blackjackdata.csv'
+    if os.path.isdir(path):
+        from dataset import open_dataset
+        features, labels = encode_dataset(open_dataset(path))
+    else:
+        import pandas as pd
+        from dataset import records_from_csv
+        features, labels = encode(records_from_csv(pd.read_csv(path, index_col=0)))
+    order = np.random.default_rng(seed).permutation(len(labels))
+    split = len(labels) - int(round(len(labels) * test_size))
+    return features[order[:split]], labels[order[:split]], features[order[split:]], labels[order[split:]]
+
+
+#each worker process keeps the data and its thread count from the initializer, so they are sent once per worker
+#instead of once per configuration
+worker_data = None
+
+
+def init_worker(threads, data):
+    global worker_data
+    #pin the thread pools before tensorflow starts them, so the workers don't fight over the cores
+    for variable in ['OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']:
+        os.environ[variable] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    worker_data = data
+
+
+def build_model(config):
+    from keras.models import Sequential
+    from keras.layers import Dense
+    model = Sequential()
+    for units, activation in config['layers']:
+        model.add(Dense(units, activation=activation))
+    model.add(Dense(1, activation='sigmoid'))
+    model.compile(loss='binary_crossentropy', optimizer=config['optimizer'])
+    return model
+
+
+#the test AUC and the best accuracy over THRESHOLDS, the two numbers ModelTraining.py reports
+def score(actuals, predictions):
+    import sklearn.metrics as metrics
+    fpr, tpr, threshold = metrics.roc_curve(actuals, predictions)
+    accuracies = [metrics.accuracy_score(actuals, (predictions >= thres).astype(int)) * 100 for thres in THRESHOLDS]
+    best = int(np.argmax(accuracies))
+    return {'auc': float(metrics.auc(fpr, tpr)), 'best_threshold': THRESHOLDS[best],
+            'accuracy': float(accuracies[best])}
+
+
+def train_config(config):
+    X_train, y_train, X_test, y_test = worker_data
+    model = build_model(config)
+    model.fit(X_train, y_train, epochs=config['epochs'], batch_size=config['batch_size'], verbose=0)
+    return score(y_test, model.predict(X_test, batch_size=4096, verbose=0))
+
+
+#train every configuration that isn't cached for this data on `workers` processes (each one pinned to
+#threads_per_worker threads, by default the cores shared out evenly) and return every configuration's result, best
+#AUC first.  results are saved to the cache as they finish
+def search(configs, X_train, y_train, X_test, y_test, workers=None, threads_per_worker=None, cache_path=CACHE_PATH):
+    data_hash = dataset_hash(X_train, y_train, X_test, y_test)
+    cache = load_cache(cache_path)
+    keys = [config_key(config, data_hash) for config in configs]
+    todo = {key: config for key, config in zip(keys, configs) if key not in cache}
+    print(f'{len(configs) - len(todo)} of {len(configs)} configurations cached, training {len(todo)}')
+    if todo:
+        cores = os.cpu_count() or 1
+        workers = min(workers or cores, len(todo))
+        threads = threads_per_worker or max(1, cores // workers)
+        #tensorflow doesn't survive a fork, so the workers start fresh
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                                 initargs=(threads, (X_train, y_train, X_test, y_test))) as pool:
+            futures = {pool.submit(train_config, config): key for key, config in todo.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                cache[key] = dict(future.result(), config=todo[key])
+                save_cache(cache, cache_path)
+                print(f"auc {cache[key]['auc']:.4f}  accuracy {cache[key]['accuracy']:.2f}%  {todo[key]}")
+    return sorted((cache[key] for key in keys), key=lambda result: result['auc'], reverse=True)
+
+
+if __name__ == '__main__':
+    results = search(DEFAULT_SWEEP, *load_training_data())
+    print('')
+    for result in results:
+        print(f"auc {result['auc']:.4f}  accuracy {result['accuracy']:.2f}% at {result['best_threshold']}  "
+              f"{result['config']}")
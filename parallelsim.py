@@ -0,0 +1,95 @@
+#run the batch simulator across a process pool...shoes are independent, so every worker plays its own share of them
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from batchsim import iter_rounds, simulate_batch
+from evaluation import HandStats
+from records import empty_records
+from recordwriter import HandRecordWriter
+
+
+#split the shoes into shards of at most shard_size.  each shard gets its own child of the root seed, so the
+#results only depend on the seed and the shard size...not on how many processes happen to run them
+def make_shards(simulations, shard_size, seed):
+    sizes = [shard_size] * (simulations // shard_size)
+    if simulations % shard_size:
+        sizes.append(simulations % shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(sizes, seeds))
+
+
+#the workers send their records back as compact structured arrays (see records.py), not lists of python objects
+def run_shard(shard, sim_kwargs):
+    num_shoes, seed = shard
+    return simulate_batch(num_shoes, seed=seed, **sim_kwargs)
+
+
+#or just the shard's statistics (see evaluation.HandStats), a fixed few hundred kilobytes however many hands it played
+def run_shard_stats(shard, sim_kwargs):
+    num_shoes, seed = shard
+    stats = HandStats()
+    for rows in iter_rounds(num_shoes, seed=seed, **sim_kwargs):
+        stats.update(rows)
+    return stats
+
+
+#play `simulations` shoes on `workers` processes (all of the cores by default) and yield each shard's records in
+#shard order.  only a couple of shards per worker are in flight at once, so a slow consumer (like a writer) never
+#has more than that in memory.  extra keyword arguments (num_decks, players, hit_stay, ...) go to simulate_batch.
+#task is what each worker runs on its shard (run_shard_stats yields each shard's statistics instead)
+def iter_shard_records(simulations, workers=None, seed=None, shard_size=500, task=run_shard, **sim_kwargs):
+    shards = make_shards(simulations, shard_size, seed)
+    workers = min(workers or os.cpu_count() or 1, max(len(shards), 1))
+    if workers == 1:
+        for shard in shards:
+            yield task(shard, sim_kwargs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard in shards:
+            pending.append(pool.submit(task, shard, sim_kwargs))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+#run every shard and merge the records into one structured array
+def run_parallel(simulations, workers=None, seed=None, shard_size=500, **sim_kwargs):
+    results = list(iter_shard_records(simulations, workers, seed, shard_size, **sim_kwargs))
+    if not results:
+        return empty_records(0, sim_kwargs.get('keep_cards', False))
+    return np.concatenate(results)
+
+
+#run every shard and stream the records into a HandRecordWriter instead of keeping them; returns the number of rows
+def run_parallel_to_writer(simulations, writer, workers=None, seed=None, shard_size=500, **sim_kwargs):
+    for records in iter_shard_records(simulations, workers, seed, shard_size, **sim_kwargs):
+        writer.write(records)
+    writer.flush()
+    return writer.rows_written
+
+
+#run every shard and merge only their statistics, so no hand records ever come back from the workers
+def run_parallel_stats(simulations, workers=None, seed=None, shard_size=500, **sim_kwargs):
+    stats = HandStats()
+    for shard_stats in iter_shard_records(simulations, workers, seed, shard_size, task=run_shard_stats, **sim_kwargs):
+        stats.merge(shard_stats)
+    return stats
+
+
+#totals over the merged records: the number of wins, pushes and losses, and how often the dealer busted
+def summarize(records):
+    hands = len(records['result'])
+    return {'hands': hands,
+            'wins': int(np.count_nonzero(records['result'] == 1)),
+            'pushes': int(np.count_nonzero(records['result'] == 0)),
+            'losses': int(np.count_nonzero(records['result'] == -1)),
+            'dealer_bust_rate': float(records['dealer_bust'].mean()) if hands else 0.0}
+
+
+if __name__ == '__main__':
+    with HandRecordWriter('blackjackdata.csv') as writer:
+        print(run_parallel_to_writer(5000, writer, seed=0), 'hands written')
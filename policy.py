@@ -0,0 +1,130 @@
+#lookup-table strategies...a strategy is a dense table of hit probabilities, so every hit/stay decision is one index
+
+import os
+import random
+import numpy as np
+from handstate import MAX_HARD, NUM_STATES, SOFT, SOFT_LIST, TOTALS, TOTAL_LIST, RANK_VALUES
+from shoe import NUM_RANKS
+
+#the table is indexed by [player total, soft, dealer upcard rank code, true count bucket, hits so far].
+#totals run from 0 to 22, and the last row is the bust state (see handstate.py), which never hits.
+#true counts of MIN_COUNT or less share the first bucket and MAX_COUNT or more share the last one, and every hand
+#that has already hit MAX_HITS or more times shares the last hits bucket
+NUM_TOTALS = MAX_HARD + 2
+MIN_COUNT = -3
+MAX_COUNT = 3
+NUM_COUNT_BUCKETS = MAX_COUNT - MIN_COUNT + 1
+MAX_HITS = 2
+TABLE_SHAPE = (NUM_TOTALS, 2, NUM_RANKS, NUM_COUNT_BUCKETS, MAX_HITS + 1)
+
+
+def count_bucket(true_count):
+    return min(max(true_count, MIN_COUNT), MAX_COUNT) - MIN_COUNT
+
+
+class Policy:
+    #each entry is the chance of hitting: 1 always hits, 0 always stays, and anything in between flips a biased
+    #coin, which is how the simulators' `random.random() > hit_stay` loops are written down as a table.
+    #hands are passed as hand states from handstate.py and upcards as rank codes from shoe.py
+    def __init__(self, table, name='custom'):
+        table = np.asarray(table, dtype=np.float32)
+        if table.shape != TABLE_SHAPE:
+            raise ValueError(f'a policy table must have the shape {TABLE_SHAPE}, not {table.shape}')
+        self.table = table
+        self.name = name
+        #plain nested lists are faster than numpy scalars for the one-hand-at-a-time simulators
+        self.rows = table.tolist()
+        #and the array lookups go straight from the hand state into one flat copy of the table
+        self.flat = table[TOTALS, SOFT.astype(np.intp)].ravel()
+
+    def hit_probability(self, state, upcard, true_count, hits):
+        return self.rows[TOTAL_LIST[state]][SOFT_LIST[state]][upcard][count_bucket(true_count)][min(hits, MAX_HITS)]
+
+    def should_hit(self, state, upcard, true_count, hits, rng=random):
+        chance = self.hit_probability(state, upcard, true_count, hits)
+        if chance <= 0 or chance >= 1:
+            return chance >= 1
+        return rng.random() < chance
+
+    def hit_probabilities(self, states, upcards, true_counts, hits):
+        #the same lookup for whole arrays of hands at once (see batchsim.py)
+        counts = np.clip(true_counts, MIN_COUNT, MAX_COUNT) - MIN_COUNT
+        cells = ((states.astype(np.intp) * NUM_RANKS + upcards) * NUM_COUNT_BUCKETS + counts) * (MAX_HITS + 1)
+        return self.flat[cells + np.minimum(hits, MAX_HITS)]
+
+    def decide(self, states, upcards, true_counts, hits, rng):
+        chance = self.hit_probabilities(states, upcards, true_counts, hits)
+        return rng.random(len(chance)) < chance
+
+    def save(self, path):
+        np.save(path, self.table)
+
+
+def load_policy(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Policy(np.load(path), name)
+
+
+#the strategies the simulators have always played, written as rules that say how likely a hit is in each cell.
+#`coin` is the chance that the simulators' coin flip comes up hit (1 - hit_stay), and `up` is the upcard's value
+#with an ace counted as 1.  both rules take one card on 11 or less, hit a 16 that was dealt against a 7 or higher,
+#and otherwise only hit under 15 when the true count says so
+
+#the strategy in FinalSimBJ.py (and batchsim.py)
+def final_sim_rule(total, soft, up, true_count, hits, coin):
+    if total <= 11:
+        return 1.0 if hits == 0 else 0.0
+    if total == 16 and hits == 0 and (up >= 7 or up == 1):
+        return coin
+    if total < 15:
+        if up == 1 or 4 <= up <= 6:
+            hit = true_count <= -3
+        else:
+            hit = true_count == 0 or true_count <= -2
+        if hit:
+            return coin
+    return 0.0
+
+
+#the strategy in basicBJSim.py and bjsimulator.py.  after the card on 11 or less, a hand that is still 11 or less
+#goes on hitting against a 4 on the coin (that simulator's checks follow one another instead of being one if/elif)
+def basic_sim_rule(total, soft, up, true_count, hits, coin):
+    if total <= 11:
+        return 1.0 if hits == 0 else coin if up == 4 else 0.0
+    if total == 16 and hits == 0 and (up >= 7 or up == 1):
+        return coin
+    if total < 15:
+        if -1 <= true_count <= 1:
+            hit = not 4 <= up <= 6
+        elif true_count >= 2:
+            hit = up >= 7 or up == 1
+        else:
+            hit = up == 10 or up == 1
+        if hit:
+            return coin
+    return 0.0
+
+
+STRATEGIES = {'final': final_sim_rule, 'basic': basic_sim_rule}
+
+
+#fill in a table by asking the rule about every cell once.  the count buckets are asked about with their own
+#true count (MIN_COUNT and MAX_COUNT for the two end buckets), and the bust row is left at 0
+def build_table(rule, hit_stay=0.5):
+    coin = 1 - hit_stay
+    #built as nested lists and turned into an array once, which is much faster than setting every cell
+    cells = [[[[[rule(total, bool(soft), RANK_VALUES[upcard], bucket + MIN_COUNT, hits, coin)
+                 for hits in range(MAX_HITS + 1)]
+                for bucket in range(NUM_COUNT_BUCKETS)]
+               for upcard in range(NUM_RANKS)]
+              for soft in (0, 1)]
+             for total in range(MAX_HARD + 1)]
+    table = np.zeros(TABLE_SHAPE, dtype=np.float32)
+    table[:MAX_HARD + 1] = cells
+    return table
+
+
+def make_policy(strategy='final', hit_stay=0.5):
+    if strategy not in STRATEGIES:
+        raise ValueError(f'unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}')
+    return Policy(build_table(STRATEGIES[strategy], hit_stay), strategy)
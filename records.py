@@ -0,0 +1,42 @@
+#compact record layouts for simulated hands...numpy structured dtypes instead of lists of python objects
+
+import numpy as np
+
+#the per-hand records, in the same order as the columns of blackjackdata.csv
+RECORD_FIELDS = ['dealer_card', 'dealer_value', 'dealer_bust', 'init_hand', 'hit', 'result', 'outcome', 'true_count']
+
+#one (hand, player) record in 9 bytes: the dealer's upcard as a rank code (see shoe.py), the totals as unsigned
+#bytes, the result as -1/0/1 and the true count as a 16 bit integer.  the same record as a row of python objects
+#(or a float64 results array and a dict snapshot of card_count per hand) takes hundreds of bytes
+RECORD_DTYPE = np.dtype([('dealer_card', np.int8), ('dealer_value', np.uint8), ('dealer_bust', np.bool_),
+                         ('init_hand', np.uint8), ('hit', np.bool_), ('result', np.int8), ('outcome', np.bool_),
+                         ('true_count', np.int16)])
+
+#room for this many cards in each hand's card buffer.  a hand only needs more when it is made of lots of aces and
+#small cards, and then num_cards still says how many cards there were while the buffer keeps the first ones
+HAND_CAPACITY = 12
+
+#a record that also keeps the cards: the player's hand and the dealer's hand as fixed-size buffers of rank codes
+#(-1 past the end of the hand) and the player's final total.  this is 9 + 2 * (HAND_CAPACITY + 1) + 1 = 36 bytes
+#per (hand, player)
+HAND_DTYPE = np.dtype(RECORD_DTYPE.descr + [('final_total', np.uint8), ('num_cards', np.uint8),
+                                            ('cards', np.int8, (HAND_CAPACITY,)), ('dealer_num_cards', np.uint8),
+                                            ('dealer_cards', np.int8, (HAND_CAPACITY,))])
+
+
+def empty_records(size, keep_cards=False):
+    records = np.zeros(size, dtype=HAND_DTYPE if keep_cards else RECORD_DTYPE)
+    if keep_cards:
+        records['cards'] = -1
+        records['dealer_cards'] = -1
+    return records
+
+
+#build a structured array from a dictionary of equal-length columns (missing card fields are left empty)
+def to_records(columns, keep_cards=False):
+    records = empty_records(len(columns['result']), keep_cards)
+    for field in records.dtype.names:
+        if field in columns:
+            records[field] = columns[field]
+    return records
+
@@ -0,0 +1,95 @@
+#streaming hand-record writer...keeps one fixed-size chunk of records in memory and writes it out when it fills up
+
+import os
+import numpy as np
+from batchsim import records_to_dataframe
+from dataset import DatasetWriter
+from records import RECORD_DTYPE, RECORD_FIELDS
+
+#the formats we can write, picked from the file extension unless one is given
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.dataset': 'dataset'}
+
+
+class HandRecordWriter:
+    #records go into a preallocated structured array (see records.py) of chunk_size rows, and every full chunk is flushed to the file, so
+    #memory use is the same whether we simulate five thousand shoes or fifty million.
+    #csv files match blackjackdata.csv (with the running row number as the index).  parquet files keep every column
+    #as its compact numeric type, with dealer_card as the rank code from shoe.py (parquet needs pyarrow installed).
+    #a .dataset path is a folder of memory-mappable .npy shards, one per chunk (see dataset.py)
+    def __init__(self, path, chunk_size=100000, fmt=None):
+        if fmt is None:
+            fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt not in FORMATS.values():
+            raise ValueError(f'cannot tell which format to write {path!r} in, pass fmt="csv", "parquet" or "dataset"')
+        self.path = path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.buffer = np.empty(chunk_size, dtype=RECORD_DTYPE)
+        self.filled = 0
+        self.rows_written = 0
+        self.parquet_writer = None
+        self.dataset_writer = DatasetWriter(path) if fmt == 'dataset' else None
+
+    def append(self, dealer_card, dealer_value, dealer_bust, init_hand, hit, result, outcome, true_count):
+        #add a single (hand, player) record; dealer_card is the rank code of the dealer's upcard
+        self.buffer[self.filled] = (dealer_card, dealer_value, dealer_bust, init_hand, hit, result, outcome, true_count)
+        self.filled += 1
+        if self.filled == self.chunk_size:
+            self.flush()
+
+    def write(self, records):
+        #add a structured array of records (like the rounds from batchsim.iter_rounds), a chunk at a time.  records
+        #that also keep the cards are cut down to the plain record fields
+        total = len(records['result'])
+        start = 0
+        while start < total:
+            take = min(total - start, self.chunk_size - self.filled)
+            chunk = records[start:start + take]
+            for field in RECORD_FIELDS:
+                self.buffer[field][self.filled:self.filled + take] = chunk[field]
+            self.filled += take
+            start += take
+            if self.filled == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        if self.filled == 0:
+            return
+        chunk = self.buffer[:self.filled]
+        if self.fmt == 'csv':
+            df = records_to_dataframe(chunk)
+            df.index = np.arange(self.rows_written, self.rows_written + self.filled)
+            first = self.rows_written == 0
+            df.to_csv(self.path, mode='w' if first else 'a', header=first)
+        elif self.fmt == 'dataset':
+            self.dataset_writer.write_shard(chunk)
+        else:
+            self.write_parquet(chunk)
+        self.rows_written += self.filled
+        self.filled = 0
+
+    def write_parquet(self, chunk):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({field: chunk[field] for field in RECORD_FIELDS})
+        if self.parquet_writer is None:
+            self.parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self.parquet_writer.write_table(table)
+
+    def close(self):
+        self.flush()
+        if self.fmt == 'csv' and self.rows_written == 0:
+            #nothing was simulated, but still leave a file with the header row
+            records_to_dataframe(self.buffer[:0]).to_csv(self.path)
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
+        if self.dataset_writer is not None:
+            self.dataset_writer.close()
+            self.dataset_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,76 @@
+#array-backed shoe shared by the simulators
+
+import random
+from array import array
+
+#every card in the shoe is stored as a small integer rank code, which is just its index in CARD_TYPES.
+#code 0 is an ace, codes 1-8 are the cards 2-9, and codes 9-12 are the ten valued cards (10, J, Q, K).
+#this is the same order the game master uses for cards_played, so the codes can be shared with it
+CARD_TYPES = ['A', 2, 3, 4, 5, 6, 7, 8, 9, 10, 'J', 'Q', 'K']
+RANK_CODES = {card: code for code, card in enumerate(CARD_TYPES)}
+#the names the cozmos read off the QR cards and send to the game master, in the same code order
+CARD_NAMES = ['Ace', 'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight', 'Nine', 'Ten', 'Jack', 'Queen', 'King']
+NAME_CODES = {name: code for code, name in enumerate(CARD_NAMES)}
+NUM_RANKS = len(CARD_TYPES)
+
+
+def card_code(card):
+    #accept the simulator cards ('A', 2, ..., 'K') or the game master card names ('Ace', ..., 'King')
+    if card in NAME_CODES:
+        return NAME_CODES[card]
+    return RANK_CODES[card]
+
+
+class Shoe:
+    #the shoe is filled once into a preallocated array and then read with a cursor, so dealing a card never
+    #shifts the rest of the shoe (list.pop(0) moves every card behind it) and nothing is reallocated mid-shoe.
+    #draw, peek, cards_remaining and penetration are all O(1)
+    def __init__(self, num_decks, rng=None):
+        self.num_decks = num_decks
+        self.size = num_decks * 52
+        self.rng = rng if rng is not None else random.Random()
+        self.cards = array('b', range(NUM_RANKS)) * (num_decks * 4)
+        self.cursor = 0
+        self.shuffle()
+
+    def shuffle(self):
+        #put every card back in the shoe and shuffle it in place
+        self.rng.shuffle(self.cards)
+        self.cursor = 0
+
+    def draw(self):
+        #return the rank code of the next card; like list.pop, running off the end raises an IndexError
+        if self.cursor >= self.size:
+            raise IndexError('draw from an empty shoe')
+        code = self.cards[self.cursor]
+        self.cursor += 1
+        return code
+
+    def draw_card(self):
+        #same as draw, but returns the card the way the simulators write it ('A', 2, ..., 10, 'J', 'Q', 'K')
+        return CARD_TYPES[self.draw()]
+
+    def peek(self, offset=0):
+        #rank code of a card still in the shoe without dealing it; offset 0 is the next card to be drawn
+        index = self.cursor + offset
+        if offset < 0 or index >= self.size:
+            raise IndexError('peek past the end of the shoe')
+        return self.cards[index]
+
+    def cards_remaining(self):
+        return self.size - self.cursor
+
+    def penetration(self):
+        #fraction of the shoe that has been dealt
+        return self.cursor / self.size
+
+    def decks_remaining(self):
+        return self.cards_remaining() / 52
+
+    def __len__(self):
+        #len(shoe) is the number of cards left, so loops like "while len(dealer_cards) > 30" work unchanged
+        return self.cards_remaining()
+
+    def __getitem__(self, offset):
+        #shoe[i] looks at the i-th undealt card, just like indexing the old list of remaining cards
+        return CARD_TYPES[self.peek(offset)]
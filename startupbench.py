@@ -0,0 +1,54 @@
+#cold start benchmark for cli.py...fails when starting `simulate` gets slower than the budget or when it pulls in
+#one of the heavy libraries that only training, evaluation or plotting need
+#
+#   python startupbench.py            (the default budget)
+#   python startupbench.py 1.0        (a budget of 1.0 seconds)
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+#libraries that must stay out of `simulate`
+HEAVY_MODULES = ['tensorflow', 'keras', 'sklearn', 'seaborn', 'matplotlib']
+
+#seconds for a fresh interpreter to start, run `simulate` on zero shoes and exit (the best of RUNS tries).  it
+#takes about 0.45-0.6s, nearly all of it numpy and pandas, so a heavy import slipping back in goes over
+DEFAULT_BUDGET = 0.75
+RUNS = 5
+
+#the child runs the command line in a fresh interpreter and reports which heavy libraries it ended up importing
+PROBE = ('import sys, cli; cli.main(sys.argv[1:]); '
+         f'print("heavy:" + ",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules))')
+
+
+def cold_start(output):
+    command = [sys.executable, '-c', PROBE, 'simulate', '--shoes', '0', '--output', output]
+    start = time.perf_counter()
+    finished = subprocess.run(command, capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start
+    report = [line for line in finished.stdout.splitlines() if line.startswith('heavy:')][-1]
+    loaded = [name for name in report[len('heavy:'):].split(',') if name]
+    return elapsed, loaded
+
+
+def main(budget=DEFAULT_BUDGET):
+    with tempfile.TemporaryDirectory() as folder:
+        results = [cold_start(os.path.join(folder, 'startup.csv')) for run in range(RUNS)]
+    best = min(elapsed for elapsed, loaded in results)
+    loaded = sorted(set(name for elapsed, loaded in results for name in loaded))
+    print(f'simulate cold start: best {best:.3f}s of {RUNS} runs (budget {budget:.3f}s)')
+    failed = False
+    if loaded:
+        print(f'FAIL: simulate imported {", ".join(loaded)}')
+        failed = True
+    if best > budget:
+        print(f'FAIL: cold start is {best - budget:.3f}s over budget')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET))